@@ -9,6 +9,7 @@ from app.models.users import User
 from app.database.base import Base
 from app.core.config import settings
 from app.models.posts import Post, Image, Like, post_image
+from app.models.jobs import Job
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
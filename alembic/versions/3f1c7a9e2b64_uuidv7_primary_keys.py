@@ -0,0 +1,77 @@
+"""generate time-ordered UUIDv7 primary keys and rekey existing posts
+
+Revision ID: 3f1c7a9e2b64
+Revises: b58dccccc834
+Create Date: 2026-10-19 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c7a9e2b64'
+down_revision: Union[str, Sequence[str], None] = 'b58dccccc834'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+UUID_GENERATE_V7 = """
+CREATE OR REPLACE FUNCTION uuid_generate_v7(ts timestamptz DEFAULT clock_timestamp())
+RETURNS uuid
+LANGUAGE sql
+VOLATILE
+AS $$
+    SELECT encode(
+        set_bit(
+            set_bit(
+                overlay(
+                    uuid_send(gen_random_uuid())
+                    PLACING substring(int8send(floor(extract(epoch FROM ts) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6
+                ),
+                52, 1
+            ),
+            53, 1
+        ),
+        'hex'
+    )::uuid
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(UUID_GENERATE_V7)
+
+    for table in ('users', 'posts', 'images'):
+        op.alter_column(table, 'id', server_default=sa.text('uuid_generate_v7()'))
+
+    # cascade id updates so existing posts can be rekeyed in place
+    op.drop_constraint('likes_post_id_fkey', 'likes', type_='foreignkey')
+    op.create_foreign_key('likes_post_id_fkey', 'likes', 'posts', ['post_id'], ['id'], ondelete='CASCADE', onupdate='CASCADE')
+    op.drop_constraint('post_images_post_id_fkey', 'post_images', type_='foreignkey')
+    op.create_foreign_key('post_images_post_id_fkey', 'post_images', 'posts', ['post_id'], ['id'], ondelete='CASCADE', onupdate='CASCADE')
+
+    # existing random ids are replaced with v7 ids derived from created_at so
+    # that ordering the feed by id matches creation order; users and images
+    # keep their ids since nothing is paginated by them
+    op.execute(
+        "UPDATE posts SET id = uuid_generate_v7(created_at) "
+        "WHERE substr(id::text, 15, 1) <> '7'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('post_images_post_id_fkey', 'post_images', type_='foreignkey')
+    op.create_foreign_key('post_images_post_id_fkey', 'post_images', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+    op.drop_constraint('likes_post_id_fkey', 'likes', type_='foreignkey')
+    op.create_foreign_key('likes_post_id_fkey', 'likes', 'posts', ['post_id'], ['id'], ondelete='CASCADE')
+
+    for table in ('users', 'posts', 'images'):
+        op.alter_column(table, 'id', server_default=None)
+
+    op.execute("DROP FUNCTION IF EXISTS uuid_generate_v7(timestamptz)")
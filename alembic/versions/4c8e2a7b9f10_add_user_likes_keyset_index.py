@@ -0,0 +1,42 @@
+"""add (user_id, liked_at, post_id) index for liked posts pagination
+
+Revision ID: 4c8e2a7b9f10
+Revises: a6f8d4c0b213
+Create Date: 2026-10-19 17:36:42.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8e2a7b9f10'
+down_revision: Union[str, Sequence[str], None] = 'a6f8d4c0b213'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# scanned backwards for newest-first keyset pages of a user's likes
+KEYSET_INDEX = ('ix_likes_user_id_liked_at_post_id', 'likes', ['user_id', 'liked_at', 'post_id'])
+
+# prefix of the index above
+REPLACED_INDEX = ('ix_likes_user_id', 'likes', ['user_id'])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        name, table, columns = KEYSET_INDEX
+        op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        name, table, _ = REPLACED_INDEX
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        name, table, columns = REPLACED_INDEX
+        op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        name, table, _ = KEYSET_INDEX
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
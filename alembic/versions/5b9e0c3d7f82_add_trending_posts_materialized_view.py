@@ -0,0 +1,43 @@
+"""add trending_posts materialized view
+
+Revision ID: 5b9e0c3d7f82
+Revises: c27e5b8d4a19
+Create Date: 2026-10-19 12:40:08.915372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e0c3d7f82'
+down_revision: Union[str, Sequence[str], None] = 'c27e5b8d4a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# likes from the last 48 hours, decayed by post age in hours (gravity 1.8)
+TRENDING_POSTS = """
+CREATE MATERIALIZED VIEW trending_posts AS
+SELECT
+    l.post_id,
+    count(*) / power(extract(epoch FROM localtimestamp - p.created_at) / 3600 + 2, 1.8) AS score
+FROM likes l
+JOIN posts p ON p.id = l.post_id
+WHERE l.liked_at > localtimestamp - interval '48 hours'
+GROUP BY l.post_id, p.created_at
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(TRENDING_POSTS)
+    # the unique index is required by REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.create_index('ix_trending_posts_post_id', 'trending_posts', ['post_id'], unique=True)
+    op.execute("CREATE INDEX ix_trending_posts_score ON trending_posts (score DESC, post_id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS trending_posts")
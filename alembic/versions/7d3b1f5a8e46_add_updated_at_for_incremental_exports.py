@@ -0,0 +1,46 @@
+"""add updated_at columns and indexes for incremental exports
+
+Revision ID: 7d3b1f5a8e46
+Revises: e41a6c2f9d07
+Create Date: 2026-10-19 15:22:47.603815
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3b1f5a8e46'
+down_revision: Union[str, Sequence[str], None] = 'e41a6c2f9d07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ('ix_posts_updated_at', 'posts', ['updated_at']),
+    ('ix_users_updated_at', 'users', ['updated_at']),
+    ('ix_likes_liked_at', 'likes', ['liked_at']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('localtimestamp'), nullable=False))
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), server_default=sa.text('localtimestamp'), nullable=False))
+    op.execute("UPDATE posts SET updated_at = created_at")
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('users', 'updated_at')
+    op.drop_column('posts', 'updated_at')
@@ -0,0 +1,53 @@
+"""add foreign key and access path indexes
+
+Revision ID: 8a4d2e6f1c35
+Revises: 3f1c7a9e2b64
+Create Date: 2026-10-19 10:03:17.204419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d2e6f1c35'
+down_revision: Union[str, Sequence[str], None] = '3f1c7a9e2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ('ix_posts_user_id', 'posts', ['user_id']),
+    ('ix_posts_created_at', 'posts', ['created_at']),
+    ('ix_likes_user_id', 'likes', ['user_id']),
+    ('ix_post_images_image_id', 'post_images', ['image_id']),
+    ('ix_users_username', 'users', ['username']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,97 @@
+"""hash partition likes by post_id
+
+Revision ID: 9e5f1b3c7d24
+Revises: 4c8e2a7b9f10
+Create Date: 2026-10-19 18:12:09.551730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e5f1b3c7d24'
+down_revision: Union[str, Sequence[str], None] = '4c8e2a7b9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# a power of two, so the table can later be split by doubling the modulus
+PARTITIONS = 16
+
+# same definition as 5b9e0c3d7f82; the view depends on likes and has to be
+# dropped while the table is swapped
+TRENDING_POSTS = """
+CREATE MATERIALIZED VIEW trending_posts AS
+SELECT
+    l.post_id,
+    count(*) / power(extract(epoch FROM localtimestamp - p.created_at) / 3600 + 2, 1.8) AS score
+FROM likes l
+JOIN posts p ON p.id = l.post_id
+WHERE l.liked_at > localtimestamp - interval '48 hours'
+GROUP BY l.post_id, p.created_at
+"""
+
+CREATE_LIKES = """
+CREATE TABLE {table} (
+    post_id uuid NOT NULL,
+    user_id uuid NOT NULL,
+    liked_at timestamp without time zone NOT NULL,
+    CONSTRAINT {table}_pkey PRIMARY KEY (post_id, user_id),
+    CONSTRAINT likes_post_id_fkey FOREIGN KEY (post_id)
+        REFERENCES posts (id) ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT likes_user_id_fkey FOREIGN KEY (user_id)
+        REFERENCES users (id) ON DELETE CASCADE
+){partition_by}
+"""
+
+LIKES_INDEXES = (
+    ('ix_likes_liked_at', ['liked_at']),
+    ('ix_likes_user_id_liked_at_post_id', ['user_id', 'liked_at', 'post_id']),
+)
+
+
+def swap_likes(partitioned: bool) -> None:
+    partition_by = " PARTITION BY HASH (post_id)" if partitioned else ""
+    op.execute(CREATE_LIKES.format(table="likes_new", partition_by=partition_by))
+    if partitioned:
+        for remainder in range(PARTITIONS):
+            op.execute(
+                f"CREATE TABLE likes_p{remainder} PARTITION OF likes_new "
+                f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+            )
+
+    # blocks likes and unlikes from a running app until the migration
+    # commits, so none land in the old table after the copy; reads go on
+    op.execute("LOCK TABLE likes IN EXCLUSIVE MODE")
+
+    # likes_new has no like_count trigger yet, so copying leaves counts alone
+    op.execute("INSERT INTO likes_new (post_id, user_id, liked_at) SELECT post_id, user_id, liked_at FROM likes")
+
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS trending_posts")
+    op.execute("DROP TABLE likes")
+    op.execute("ALTER TABLE likes_new RENAME TO likes")
+    op.execute("ALTER TABLE likes RENAME CONSTRAINT likes_new_pkey TO likes_pkey")
+
+    # on a partitioned table these cascade to every partition
+    for name, columns in LIKES_INDEXES:
+        op.create_index(name, 'likes', columns, unique=False)
+    op.execute(
+        "CREATE TRIGGER likes_like_count AFTER INSERT OR DELETE ON likes "
+        "FOR EACH ROW EXECUTE FUNCTION posts_like_count()"
+    )
+
+    op.execute(TRENDING_POSTS)
+    op.create_index('ix_trending_posts_post_id', 'trending_posts', ['post_id'], unique=True)
+    op.execute("CREATE INDEX ix_trending_posts_score ON trending_posts (score DESC, post_id)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    swap_likes(partitioned=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    swap_likes(partitioned=False)
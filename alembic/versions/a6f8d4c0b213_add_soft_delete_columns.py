@@ -0,0 +1,35 @@
+"""add deleted_at to posts and users for background deletion
+
+Revision ID: a6f8d4c0b213
+Revises: 7d3b1f5a8e46
+Create Date: 2026-10-19 16:48:05.377261
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6f8d4c0b213'
+down_revision: Union[str, Sequence[str], None] = '7d3b1f5a8e46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.add_column('users', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # partial indexes stay tiny: they only hold rows waiting for the purge
+    op.create_index('ix_posts_deleted_at', 'posts', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.create_index('ix_users_deleted_at', 'users', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_deleted_at', table_name='users', postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.drop_index('ix_posts_deleted_at', table_name='posts', postgresql_where=sa.text('deleted_at IS NOT NULL'))
+    op.drop_column('users', 'deleted_at')
+    op.drop_column('posts', 'deleted_at')
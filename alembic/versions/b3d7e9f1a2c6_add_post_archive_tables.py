@@ -0,0 +1,68 @@
+"""add archive tables for cold posts, likes and image links
+
+Revision ID: b3d7e9f1a2c6
+Revises: 9e5f1b3c7d24
+Create Date: 2026-10-19 19:05:44.107362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d7e9f1a2c6'
+down_revision: Union[str, Sequence[str], None] = '9e5f1b3c7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('posts_archive',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('title', sa.VARCHAR(length=50), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('content_search', postgresql.TSVECTOR(), sa.Computed('to_tsvector(\'english\', "content")', persisted=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('like_count', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.text('localtimestamp'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_posts_archive_content_search', 'posts_archive', ['content_search'], unique=False, postgresql_using='gin')
+    op.create_index('ix_posts_archive_user_id_id', 'posts_archive', ['user_id', 'id'], unique=False)
+
+    op.create_table('likes_archive',
+    sa.Column('post_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('liked_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts_archive.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'user_id')
+    )
+    op.create_index(op.f('ix_likes_archive_user_id'), 'likes_archive', ['user_id'], unique=False)
+
+    op.create_table('post_images_archive',
+    sa.Column('post_id', sa.UUID(), nullable=False),
+    sa.Column('image_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts_archive.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['image_id'], ['images.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'image_id')
+    )
+    op.create_index(op.f('ix_post_images_archive_image_id'), 'post_images_archive', ['image_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_post_images_archive_image_id'), table_name='post_images_archive')
+    op.drop_table('post_images_archive')
+    op.drop_index(op.f('ix_likes_archive_user_id'), table_name='likes_archive')
+    op.drop_table('likes_archive')
+    op.drop_index('ix_posts_archive_user_id_id', table_name='posts_archive')
+    op.drop_index('idx_posts_archive_content_search', table_name='posts_archive', postgresql_using='gin')
+    op.drop_table('posts_archive')
@@ -0,0 +1,82 @@
+"""add posts.like_count and (column, id) indexes for whitelisted sorts
+
+Revision ID: c27e5b8d4a19
+Revises: 8a4d2e6f1c35
+Create Date: 2026-10-19 11:26:52.730148
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c27e5b8d4a19'
+down_revision: Union[str, Sequence[str], None] = '8a4d2e6f1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LIKE_COUNT_TRIGGER = """
+CREATE OR REPLACE FUNCTION posts_like_count() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET like_count = like_count + 1 WHERE id = NEW.post_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE posts SET like_count = like_count - 1 WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+SORT_INDEXES = (
+    ('ix_posts_created_at_id', 'posts', ['created_at', 'id']),
+    ('ix_posts_title_id', 'posts', ['title', 'id']),
+    ('ix_posts_like_count_id', 'posts', ['like_count', 'id']),
+    ('ix_users_username_id', 'users', ['username', 'id']),
+)
+
+# single column indexes made redundant by the composite ones above
+REPLACED_INDEXES = (
+    ('ix_posts_created_at', 'posts', ['created_at']),
+    ('ix_posts_title', 'posts', ['title']),
+    ('ix_users_username', 'users', ['username']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE posts SET like_count = counts.total "
+        "FROM (SELECT post_id, count(*) AS total FROM likes GROUP BY post_id) AS counts "
+        "WHERE posts.id = counts.post_id"
+    )
+    op.execute(LIKE_COUNT_TRIGGER)
+    op.execute(
+        "CREATE TRIGGER likes_like_count AFTER INSERT OR DELETE ON likes "
+        "FOR EACH ROW EXECUTE FUNCTION posts_like_count()"
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in SORT_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in SORT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+    op.execute("DROP TRIGGER IF EXISTS likes_like_count ON likes")
+    op.execute("DROP FUNCTION IF EXISTS posts_like_count()")
+    op.drop_column('posts', 'like_count')
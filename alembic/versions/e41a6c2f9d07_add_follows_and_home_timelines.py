@@ -0,0 +1,82 @@
+"""add follows, home_timelines and users.follower_count
+
+Revision ID: e41a6c2f9d07
+Revises: 5b9e0c3d7f82
+Create Date: 2026-10-19 14:05:33.118954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41a6c2f9d07'
+down_revision: Union[str, Sequence[str], None] = '5b9e0c3d7f82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FOLLOWER_COUNT_TRIGGER = """
+CREATE OR REPLACE FUNCTION users_follower_count() RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE users SET follower_count = follower_count + 1 WHERE id = NEW.followee_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE users SET follower_count = follower_count - 1 WHERE id = OLD.followee_id;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('follows',
+    sa.Column('follower_id', sa.UUID(), nullable=False),
+    sa.Column('followee_id', sa.UUID(), nullable=False),
+    sa.Column('followed_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('follower_id <> followee_id', name='ck_follows_not_self'),
+    sa.ForeignKeyConstraint(['followee_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('follower_id', 'followee_id')
+    )
+    op.create_index('ix_follows_followee_id_follower_id', 'follows', ['followee_id', 'follower_id'], unique=False)
+    op.create_table('home_timelines',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('post_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE', onupdate='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    op.create_index(op.f('ix_home_timelines_post_id'), 'home_timelines', ['post_id'], unique=False)
+    op.execute(FOLLOWER_COUNT_TRIGGER)
+    op.execute(
+        "CREATE TRIGGER follows_follower_count AFTER INSERT OR DELETE ON follows "
+        "FOR EACH ROW EXECUTE FUNCTION users_follower_count()"
+    )
+
+    # (user_id, id) serves both the user_id foreign key and the read-time
+    # merge of the latest posts of large accounts
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_user_id_id', 'posts', ['user_id', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_posts_user_id', table_name='posts', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_posts_user_id', 'posts', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_posts_user_id_id', table_name='posts', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_index(op.f('ix_home_timelines_post_id'), table_name='home_timelines')
+    op.drop_table('home_timelines')
+    op.drop_index('ix_follows_followee_id_follower_id', table_name='follows')
+    op.drop_table('follows')
+    op.execute("DROP FUNCTION IF EXISTS users_follower_count()")
+    op.drop_column('users', 'follower_count')
@@ -0,0 +1,40 @@
+"""add jobs table for the Postgres-backed job queue
+
+Revision ID: f2a8c6e4d1b9
+Revises: b3d7e9f1a2c6
+Create Date: 2026-10-19 21:12:08.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c6e4d1b9'
+down_revision: Union[str, Sequence[str], None] = 'b3d7e9f1a2c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.UUID(), server_default=sa.text('uuid_generate_v7()'), nullable=False),
+    sa.Column('job_type', sa.VARCHAR(length=50), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('run_at', sa.DateTime(), server_default=sa.text('localtimestamp'), nullable=False),
+    sa.Column('failed_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_job_type_run_at', 'jobs', ['job_type', 'run_at'], unique=False, postgresql_where=sa.text('failed_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_job_type_run_at', table_name='jobs', postgresql_where=sa.text('failed_at IS NULL'))
+    op.drop_table('jobs')
@@ -0,0 +1,161 @@
+import re
+import time
+import asyncio
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# (group, methods, path pattern below the API prefix), first match wins;
+# cheap single-row reads such as GET /posts/{post_id}/ stay unlimited, and
+# the SSE stream is left out because it holds its slot for the whole session
+ROUTE_GROUPS = [
+    ("uploads", {"POST"}, re.compile(r"^/posts/images/upload/$")),
+    ("search", {"GET"}, re.compile(r"^/(posts|users)/search/$")),
+    ("feed", {"GET"}, re.compile(r"^(/posts/feed/|/users/[^/]+/timeline/)$")),
+    ("feed", {"POST"}, re.compile(r"^/(posts|users)/batch/$")),
+    ("writes", WRITE_METHODS, re.compile(r"^/(posts|users)/")),
+]
+
+# upper bounds in milliseconds of the exported queue wait histogram
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def api_path(path: str) -> str:
+    if path.startswith(settings.API_VERSION_1_PREFIX):
+        return path[len(settings.API_VERSION_1_PREFIX):]
+    return path
+
+
+def route_group(method: str, path: str) -> str | None:
+    path = api_path(path)
+    for group, methods, pattern in ROUTE_GROUPS:
+        if method in methods and pattern.match(path):
+            return group
+    return None
+
+
+class AdmissionGroup:
+    '''Concurrency limit plus a bounded wait queue for one route group'''
+
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.waiting = 0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    async def acquire(self) -> bool:
+        if not self.semaphore.locked():
+            # a free slot is taken without suspending, so a burst cannot
+            # slip past the queue check below
+            await self.semaphore.acquire()
+            self.record_wait(0.0)
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if self.waiting >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self.semaphore.acquire(), timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+        self.record_wait(time.perf_counter() - start)
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self.semaphore.release()
+
+    def record_wait(self, seconds: float):
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+        ms = seconds * 1000
+        for i, bound in enumerate(WAIT_BUCKETS_MS):
+            if ms <= bound:
+                self.wait_buckets[i] += 1
+                return
+        self.wait_buckets[-1] += 1
+
+    def to_json(self) -> dict:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+        buckets["inf"] = self.wait_buckets[-1]
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_avg_ms": self.wait_total / self.admitted * 1000 if self.admitted else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+            "wait_histogram": buckets,
+        }
+
+
+admission_groups = {
+    name: AdmissionGroup(name, concurrency, queue_size)
+    for name, (concurrency, queue_size) in settings.ADMISSION_LIMITS.items()
+}
+
+
+def admission_stats() -> dict:
+    return {name: group.to_json() for name, group in admission_groups.items()}
+
+
+class AdmissionMiddleware:
+    '''Sheds load per route group with a fast 503 instead of queueing without bound'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL_ENABLED:
+            return await self.app(scope, receive, send)
+
+        group = admission_groups.get(route_group(scope["method"], scope["path"]))
+        if not group:
+            return await self.app(scope, receive, send)
+
+        if not await group.acquire():
+            response = JSONResponse(
+                status_code=503,
+                content={
+                    "error_code": "Service unavailable",
+                    "message": f"Too many {group.name} requests in flight",
+                    "resolution": "Retry the request after the Retry-After delay",
+                },
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            return await response(scope, receive, send)
+
+        # the slot is held until the response body has been sent
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
@@ -0,0 +1,127 @@
+import time
+import logging
+from collections import OrderedDict
+
+from app.core.config import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# stored for lookups that found nothing, so misses are cached as well
+MISSING = ""
+
+
+class LocalTier:
+    '''Size-limited LRU with per-entry expiry'''
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: float):
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self.entries.pop(key, None)
+
+
+class RedisTier:
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def delete(self, *keys: str):
+        self.client.delete(*keys)
+
+
+def shared_tier(url: str | None) -> LocalTier | RedisTier | None:
+    '''redis:// URLs need the optional redis package; memory:// is an in-process stand-in'''
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return LocalTier(settings.USER_CACHE_MAX_ENTRIES)
+    if redis is None:
+        logger.warning("redis is not installed, running without the shared cache tier")
+        return None
+    return RedisTier(url)
+
+
+class TwoLevelCache:
+    '''Per-process LRU in front of an optional shared tier'''
+
+    def __init__(self, prefix: str, shared: LocalTier | RedisTier | None):
+        self.prefix = prefix
+        # other processes cannot invalidate this tier, so it keeps entries briefly
+        self.local = LocalTier(settings.USER_CACHE_MAX_ENTRIES)
+        self.shared = shared
+
+    def get(self, key: str) -> str | None:
+        key = self.prefix + key
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        try:
+            value = self.shared.get(key)
+        except Exception:
+            # the shared tier is an optimisation; the database still answers
+            logger.exception("Shared cache read failed")
+            return None
+
+        if value is not None:
+            self.local.set(key, value, self.local_ttl(value))
+        return value
+
+    def set(self, key: str, value: str):
+        key = self.prefix + key
+        self.local.set(key, value, self.local_ttl(value))
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value, self.ttl(value))
+            except Exception:
+                logger.exception("Shared cache write failed")
+
+    def delete(self, *keys: str) -> bool:
+        '''False when the shared tier could not be cleared'''
+        keys = [self.prefix + key for key in keys]
+        self.local.delete(*keys)
+        if self.shared is not None:
+            try:
+                self.shared.delete(*keys)
+            except Exception:
+                logger.exception("Shared cache delete failed")
+                return False
+        return True
+
+    def ttl(self, value: str) -> float:
+        if value == MISSING:
+            return settings.USER_CACHE_NEGATIVE_TTL_SECONDS
+        return settings.USER_CACHE_TTL_SECONDS
+
+    def local_ttl(self, value: str) -> float:
+        return min(self.ttl(value), settings.USER_CACHE_LOCAL_TTL_SECONDS)
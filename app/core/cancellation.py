@@ -0,0 +1,69 @@
+import asyncio
+from typing import Callable
+from fastapi import Request
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.admission import route_group
+
+DISCONNECT_CALLBACKS = "app.disconnect_callbacks"
+
+
+def on_disconnect(request: Request, callback: Callable[[], None]):
+    '''Run callback if the client of this request goes away before the response'''
+    callbacks = request.scope.get(DISCONNECT_CALLBACKS)
+    if callbacks is not None:
+        callbacks.append(callback)
+
+
+def cancel_query(db: Session):
+    # only set while the session holds a connection, see app/database/session.py
+    dbapi_connection = db.info.get("dbapi_connection")
+    if dbapi_connection is not None:
+        # sends a cancel request over a separate socket; run it off the event loop
+        asyncio.get_running_loop().run_in_executor(None, dbapi_connection.cancel_safe)
+
+
+class CancelOnDisconnectMiddleware:
+    '''Watches for http.disconnect while a request runs and fires its disconnect callbacks'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        group = route_group(scope["method"], scope["path"])
+        if group not in settings.CANCEL_ON_DISCONNECT_GROUPS:
+            return await self.app(scope, receive, send)
+
+        callbacks = scope[DISCONNECT_CALLBACKS] = []
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        response_complete = False
+
+        # the app reads from the queue while this task keeps listening, so a
+        # disconnect is seen even while the handler waits on the database
+        async def listen():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    # servers also report a disconnect once the response is out
+                    if not response_complete:
+                        for callback in callbacks:
+                            callback()
+                    return
+
+        async def send_wrapper(message: Message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        listener = asyncio.create_task(listen())
+        try:
+            await self.app(scope, messages.get, send_wrapper)
+        finally:
+            listener.cancel()
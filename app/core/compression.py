@@ -0,0 +1,162 @@
+import gzip
+import time
+from collections import OrderedDict
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.admission import route_group
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# encodings in server preference order; brotli and zstd are optional installs
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = zstandard.ZstdCompressor(level=3).compress
+if brotli is not None:
+    ENCODERS["br"] = lambda body: brotli.compress(body, quality=5)
+ENCODERS["gzip"] = lambda body: gzip.compress(body, compresslevel=6)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    '''Pick the preferred encoding the client accepts, honouring q=0'''
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip()] = quality
+
+    for encoding in ENCODERS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class CachedResponse:
+    '''A complete response body plus every encoding of it compressed so far'''
+
+    def __init__(self, status: int, headers: list, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.bodies = {None: body}
+        self.expires_at = time.monotonic() + settings.RESPONSE_CACHE_TTL_SECONDS
+
+    def body(self, encoding: str | None) -> bytes:
+        # compressed once on the first hit asking for it, then reused
+        if encoding not in self.bodies:
+            self.bodies[encoding] = ENCODERS[encoding](self.bodies[None])
+        return self.bodies[encoding]
+
+
+class ResponseCache:
+    def __init__(self):
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+            self.entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
+def compressible(headers: Headers, body: bytes) -> bool:
+    return (
+        len(body) >= settings.COMPRESSION_MIN_SIZE
+        and "content-encoding" not in headers
+        and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+    )
+
+
+class CompressionMiddleware:
+    '''Negotiated zstd/br/gzip for complete responses plus a short-lived feed and search page cache'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+
+        cache_key = None
+        if (
+            scope["method"] == "GET"
+            and route_group(scope["method"], scope["path"]) in settings.RESPONSE_CACHE_GROUPS
+        ):
+            cache_key = f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+            entry = response_cache.get(cache_key)
+            if entry is not None:
+                return await self.send_entry(entry, encoding, send)
+
+        start_message: Message | None = None
+        streaming = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, streaming
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if streaming:
+                return await send(message)
+
+            if message["type"] != "http.response.body" or message.get("more_body", False):
+                # streamed bodies (SSE, NDJSON exports, pathsend or zero-copy
+                # files) pass through as they are
+                streaming = True
+                await send(start_message)
+                return await send(message)
+
+            entry = CachedResponse(
+                start_message["status"], start_message["headers"], message.get("body", b"")
+            )
+            if cache_key is not None and entry.status == 200:
+                response_cache.set(cache_key, entry)
+            await self.send_entry(entry, encoding, send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def send_entry(self, entry: CachedResponse, encoding: str | None, send: Send):
+        headers = MutableHeaders(raw=list(entry.headers))
+        body = entry.body(None)
+
+        if compressible(headers, body):
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                body = entry.body(encoding)
+                headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(body))
+
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
@@ -1,3 +1,4 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +12,126 @@ class Settings(BaseSettings):
     DATABASE_USERNAME: str
     DATABASE_PASSWORD: str
     DATABASE_URL: str
+    DATABASE_PREPARE_THRESHOLD: int | None = 2
+
+    #Trending feed
+    TRENDING_REFRESH_ENABLED: bool = True
+    TRENDING_REFRESH_SECONDS: int = 60
+
+    #Home timelines
+    TIMELINE_FANOUT_BATCH_SIZE: int = 1000
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 10000
+    TIMELINE_BACKFILL_POSTS: int = 20
+
+    #Live feed events
+    EVENTS_TICK_SECONDS: float = 1.0
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_SUBSCRIBER_QUEUE_SIZE: int = 100
+    EVENTS_MAX_POSTS_PER_TICK: int = 100
+
+    #Admin
+    ADMIN_API_KEY: str | None = None
+    EXPORT_CHUNK_SIZE: int = 1000
+    IMPORT_CHUNK_SIZE: int = 1000
+    IMPORT_MAX_REPORTED_ERRORS: int = 1000
+
+    #Background deletion
+    DELETION_WORKER_ENABLED: bool = True
+    DELETION_BATCH_SIZE: int = 1000
+    DELETION_POLL_SECONDS: float = 5.0
+
+    #Image storage
+    IMAGE_UPLOAD_DIR: str = "app/uploads/images"
+    IMAGE_GC_ENABLED: bool = True
+    IMAGE_GC_INTERVAL_SECONDS: float = 3600.0
+    IMAGE_GC_GRACE_SECONDS: int = 86400
+    IMAGE_GC_BATCH_SIZE: int = 500
+    IMAGE_GC_FILES_PER_SECOND: int = 200
+
+    #Archiving
+    ARCHIVE_ENABLED: bool = False
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_POLL_SECONDS: float = 600.0
+
+    #Warm-up
+    WARMUP_ENABLED: bool = True
+    WARMUP_CONNECTIONS: int = 5
+    WARMUP_CACHED_USERS: int = 100
+
+    #Background jobs
+    JOBS_ENABLED: bool = True
+    # "memory" keeps jobs in the process, "postgres" in the jobs table
+    JOBS_BACKEND: str = "memory"
+    # job type -> workers
+    JOBS_CONCURRENCY: dict[str, int] = {
+        "fan_out": 4,
+        "delete_files": 2,
+        "invalidate_user_cache": 1,
+    }
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_SECONDS: float = 1.0
+    JOBS_MAX_BACKOFF_SECONDS: float = 300.0
+    JOBS_POLL_SECONDS: float = 1.0
+    JOBS_LEASE_SECONDS: float = 300.0
+
+    #Admission control
+    # route group -> (concurrent requests, queued requests)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_LIMITS: dict[str, tuple[int, int]] = {
+        "search": (8, 16),
+        "feed": (32, 64),
+        "writes": (32, 64),
+        "uploads": (4, 8),
+    }
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    #Query timeouts
+    # route group -> SET LOCAL statement_timeout in milliseconds
+    STATEMENT_TIMEOUTS_MS: dict[str, int] = {
+        "search": 2000,
+        "feed": 2000,
+        "writes": 5000,
+        "uploads": 5000,
+    }
+    CANCEL_ON_DISCONNECT_GROUPS: list[str] = ["search"]
+
+    #Compression
+    COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_CACHE_GROUPS: list[str] = ["feed", "search"]
+    RESPONSE_CACHE_TTL_SECONDS: float = 5.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+
+    #Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    IDEMPOTENCY_WAIT_SECONDS: float = 30.0
+
+    #User cache
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 300.0
+    USER_CACHE_LOCAL_TTL_SECONDS: float = 30.0
+    USER_CACHE_NEGATIVE_TTL_SECONDS: float = 30.0
+    USER_CACHE_SHARED_URL: str | None = None
+
+    #Batch endpoints
+    MAX_BATCH_SIZE: int = 100
+
+    #Tracing
+    OTEL_ENABLED: bool = False
+    OTEL_SERVICE_NAME: str = "mini-social-media-feed"
+    OTEL_EXPORTER: str = "console"
+    OTEL_EXPORT_FILE: str = "traces.jsonl"
+    OTEL_SAMPLE_RATIO: float = 0.1
+
+    @field_validator("DATABASE_PREPARE_THRESHOLD", mode="before")
+    @classmethod
+    def prepare_threshold_off(cls, value):
+        # an environment variable can only spell None as a string
+        if isinstance(value, str) and value.strip().lower() in ("", "none", "null"):
+            return None
+        return value
 
     class Config:
         env_file = ".env"
@@ -42,6 +42,34 @@ class InvalidImageUrlError(AppException):
     '''No Image found with the provided url'''
     pass
 
+class InvalidFileNameError(AppException):
+    '''Image name with a directory part'''
+    pass
+
+class BatchSizeError(AppException):
+    '''Batch request has no items or too many items'''
+    pass
+
+class InvalidSortError(AppException):
+    '''Unsupported sort field or order'''
+    pass
+
+class InvalidFollowError(AppException):
+    '''User tried to follow themselves'''
+    pass
+
+class AdminAuthError(AppException):
+    '''Missing or invalid admin API key'''
+    pass
+
+class InvalidCursorError(AppException):
+    '''Pagination cursor that was not issued by the API'''
+    pass
+
+class QueryTimeoutError(AppException):
+    '''Query cancelled by statement timeout or client disconnect'''
+    pass
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
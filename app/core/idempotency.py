@@ -0,0 +1,197 @@
+import re
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.admission import api_path
+
+# writes that mobile clients retry; matched below the API prefix
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/posts/$"),
+    re.compile(r"^/posts/[^/]+/like/$"),
+    re.compile(r"^/posts/images/upload/$"),
+]
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse:
+    def __init__(self, status: int, headers: list, body: bytes, fingerprint: str):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        # hash of the request body the key was first used with
+        self.fingerprint = fingerprint
+        self.expires_at = time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS
+
+
+class IdempotencyStore:
+    '''Responses by idempotency key, plus a future for each request still running'''
+
+    def __init__(self):
+        self.responses: OrderedDict[str, StoredResponse] = OrderedDict()
+        self.in_flight: dict[str, tuple[asyncio.Future, str]] = {}
+
+    def get(self, key: str) -> StoredResponse | None:
+        response = self.responses.get(key)
+        if response is not None and response.expires_at < time.monotonic():
+            del self.responses[key]
+            return None
+        return response
+
+    def set(self, key: str, response: StoredResponse):
+        self.responses[key] = response
+        self.responses.move_to_end(key)
+        while len(self.responses) > settings.IDEMPOTENCY_MAX_KEYS:
+            self.responses.popitem(last=False)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def error_response(status_code: int, error_code: str, message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"error_code": error_code, "message": message},
+    )
+
+
+async def read_body(receive: Receive) -> bytes | None:
+    '''The whole request body, or None if the client disconnected first'''
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def fingerprint_body(headers: Headers, body: bytes) -> str:
+    # clients pick a new multipart boundary on every retry of an upload,
+    # so it is left out of the fingerprint
+    _, _, boundary = headers.get("content-type", "").partition("boundary=")
+    if boundary:
+        body = body.replace(boundary.strip('"').encode("latin-1"), b"")
+    return hashlib.sha256(body).hexdigest()
+
+
+def key_reused() -> JSONResponse:
+    return error_response(
+        422, "Idempotency key reused", "This Idempotency-Key was used with a different request body"
+    )
+
+
+async def replay(response: StoredResponse, send: Send):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status,
+            "headers": response.headers + [(b"idempotent-replayed", b"true")],
+        }
+    )
+    await send({"type": "http.response.body", "body": response.body})
+
+
+class IdempotencyMiddleware:
+    '''Replays the stored response for a repeated Idempotency-Key instead of redoing the write'''
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+
+        path = api_path(scope["path"])
+        if not any(pattern.match(path) for pattern in IDEMPOTENT_ROUTES):
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        client_key = headers.get("idempotency-key")
+        if client_key is None:
+            return await self.app(scope, receive, send)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            response = error_response(
+                400, "Invalid idempotency key", f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+            )
+            return await response(scope, receive, send)
+
+        # a key only replays the route it was first used on, and only for
+        # the same body, so the body is buffered to fingerprint it
+        key = f"{path}:{client_key}"
+        store = idempotency_store
+
+        body = await read_body(receive)
+        if body is None:
+            return
+        fingerprint = fingerprint_body(headers, body)
+
+        while True:
+            stored = store.get(key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    return await key_reused()(scope, receive, send)
+                return await replay(stored, send)
+
+            if key not in store.in_flight:
+                break
+
+            running, running_fingerprint = store.in_flight[key]
+            if running_fingerprint != fingerprint:
+                return await key_reused()(scope, receive, send)
+
+            # a concurrent duplicate waits for the first request's outcome
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(running), timeout=settings.IDEMPOTENCY_WAIT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                response = error_response(
+                    409, "Request in progress", "A request with this Idempotency-Key is still running"
+                )
+                return await response(scope, receive, send)
+
+        running = asyncio.get_running_loop().create_future()
+        store.in_flight[key] = (running, fingerprint)
+        start_message: Message | None = None
+        response_body = []
+        body_sent = False
+
+        async def receive_buffered() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                response_body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_buffered, send_wrapper)
+        finally:
+            # server errors are not stored, so the client's retry runs again
+            if start_message is not None and start_message["status"] < 500:
+                store.set(
+                    key,
+                    StoredResponse(
+                        start_message["status"],
+                        start_message["headers"],
+                        b"".join(response_body),
+                        fingerprint,
+                    ),
+                )
+            del store.in_flight[key]
+            running.set_result(None)
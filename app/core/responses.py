@@ -0,0 +1,52 @@
+import os
+import stat
+import anyio
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+from fastapi.responses import FileResponse
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class ImageResponse(FileResponse):
+    '''FileResponse that lets servers with the zero-copy send extension sendfile the image'''
+
+    # pathsend servers are already handled by FileResponse and everything else
+    # falls back to its chunked reads, so read bigger chunks there
+    chunk_size = 256 * 1024
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # only whole-file GETs take the zero-copy path; HEAD, Range and
+        # If-Range handling stays with FileResponse, so no private hook of it
+        # is overridden
+        if (
+            ZEROCOPY_EXTENSION not in scope.get("extensions", {})
+            or scope["method"].upper() != "GET"
+            or "range" in Headers(scope=scope)
+        ):
+            return await super().__call__(scope, receive, send)
+
+        if self.stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            if not stat.S_ISREG(stat_result.st_mode):
+                raise RuntimeError(f"File at path {self.path} is not a file.")
+            self.set_stat_headers(stat_result)
+
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await self.send_file(send, 0, None)
+
+        if self.background is not None:
+            await self.background()
+
+    async def send_file(self, send: Send, offset: int, count: int | None):
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            message = {"type": ZEROCOPY_EXTENSION, "file": file, "offset": offset}
+            if count is not None:
+                message["count"] = count
+            await send(message)
+        finally:
+            file.close()
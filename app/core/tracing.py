@@ -0,0 +1,161 @@
+import inspect
+import logging
+import functools
+import threading
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import event
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.trace import Status, StatusCode
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SpanExporter,
+        SpanExportResult,
+    )
+except ImportError:
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+
+def tracing_enabled() -> bool:
+    return settings.OTEL_ENABLED and trace is not None
+
+
+def get_tracer():
+    return trace.get_tracer("app")
+
+
+if trace is not None:
+
+    class FileSpanExporter(SpanExporter):
+        '''Appends finished spans to a local file, one JSON span per line'''
+
+        def __init__(self, path: str):
+            self.path = path
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(span.to_json(indent=None) + "\n")
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            pass
+
+
+def setup_tracing() -> None:
+    if not settings.OTEL_ENABLED:
+        return
+
+    if trace is None:
+        logger.warning("OTEL_ENABLED is set but opentelemetry-sdk is not installed")
+        return
+
+    if settings.OTEL_EXPORTER == "file":
+        exporter = FileSpanExporter(settings.OTEL_EXPORT_FILE)
+    else:
+        exporter = ConsoleSpanExporter()
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.OTEL_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def traced(name: str | None = None) -> Callable:
+    '''Wrap a function in a span, a no-op when tracing is disabled'''
+
+    def decorator(func: Callable) -> Callable:
+        if not tracing_enabled():
+            return func
+
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().start_as_current_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_methods(cls: type) -> type:
+    '''Trace every public method of a service class'''
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_") or not inspect.isfunction(value):
+            continue
+        if inspect.isgeneratorfunction(value) or inspect.isasyncgenfunction(value):
+            continue
+        setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    '''Route class that opens a span around each handler call'''
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not tracing_enabled():
+            return handler
+
+        span_name = f"route {self.name}"
+
+        async def traced_handler(request: Request):
+            attributes = {"http.method": request.method, "http.route": self.path}
+            with get_tracer().start_as_current_span(span_name, attributes=attributes):
+                return await handler(request)
+
+        return traced_handler
+
+
+def instrument_engine(engine: Any) -> None:
+    '''Open a span for every SQL statement sent through the engine'''
+    if not tracing_enabled():
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.split(None, 1)[0].upper() if statement else "SQL"
+        context._otel_span = get_tracer().start_span(
+            f"sql {operation}",
+            attributes={"db.system": "postgresql", "db.statement": statement},
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        span = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
@@ -1,3 +1,8 @@
+from sqlalchemy import MetaData
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
+
+# materialized views are created by migrations; keeping them off
+# Base.metadata stops autogenerate from treating them as tables
+view_metadata = MetaData()
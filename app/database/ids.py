@@ -0,0 +1,16 @@
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    '''Time-ordered UUID (RFC 9562 version 7): 48-bit unix ms timestamp + random bits'''
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= (rand >> 68) << 64
+    value |= 0b10 << 62
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
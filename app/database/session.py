@@ -1,8 +1,52 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, Connection
+from sqlalchemy.orm import Session, sessionmaker, with_loader_criteria, ORMExecuteState
 
+from app.models.users import User
+from app.models.posts import Post
 from app.core.config import settings
+from app.core.tracing import instrument_engine
 
-db_engine = create_engine(settings.DATABASE_URL)
+# psycopg prepares a statement server-side once a connection has run it
+# prepare_threshold times; None turns that off, as PgBouncer in transaction
+# mode needs
+db_engine = create_engine(
+    settings.DATABASE_URL,
+    connect_args={"prepare_threshold": settings.DATABASE_PREPARE_THRESHOLD},
+)
+instrument_engine(db_engine)
 
 SessionLocal = sessionmaker(autoflush=False, autocommit=False, bind=db_engine)
+
+
+# built once rather than on every select
+HIDE_DELETED = (
+    with_loader_criteria(Post, Post.deleted_at.is_(None), include_aliases=True),
+    with_loader_criteria(User, User.deleted_at.is_(None), include_aliases=True),
+)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def hide_deleted_rows(execute_state: ORMExecuteState):
+    '''Hide soft-deleted posts and users from every ORM select'''
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(*HIDE_DELETED)
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def set_statement_timeout(session: Session, transaction, connection: Connection):
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    # kept for app/core/cancellation.py to cancel a running query with
+    session.info["dbapi_connection"] = connection.connection.dbapi_connection
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def forget_connection(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop("dbapi_connection", None)
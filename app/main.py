@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+import asyncio
+from psycopg.errors import QueryCanceled
+from fastapi import FastAPI, Request
+from sqlalchemy.exc import OperationalError
+from contextlib import asynccontextmanager
 from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.tracing import setup_tracing
+from app.core.admission import AdmissionMiddleware
+from app.core.cancellation import CancelOnDisconnectMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.idempotency import IdempotencyMiddleware
 from app.core.exceptions import (
     ServerError,
     UserExistError,
@@ -12,19 +21,69 @@ from app.core.exceptions import (
     PostNotFoundError,
     PostsNotFoundError,
     create_exception_handler,
-    InvalidImageUrlError
+    InvalidImageUrlError,
+    InvalidFileNameError,
+    BatchSizeError,
+    InvalidSortError,
+    InvalidFollowError,
+    AdminAuthError,
+    QueryTimeoutError,
+    InvalidCursorError,
 )
 from app.routers.v1.users import user_router_v1
 from app.routers.v1.posts import post_router_v1
+from app.routers.v1.admin import admin_router_v1
+from app.services.events import event_broker
+from app.tasks.trending import run_trending_refresher
+from app.tasks.deletion import run_deletion_worker
+from app.tasks.image_gc import run_image_gc
+from app.tasks.archive import run_archiver
+from app.tasks.warmup import warm_up
+from app.tasks.jobs import job_runner
+
+setup_tracing()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ENABLED:
+        await warm_up()
+
+    background_tasks = [asyncio.create_task(event_broker.run())]
+    if settings.TRENDING_REFRESH_ENABLED:
+        background_tasks.append(asyncio.create_task(run_trending_refresher()))
+    if settings.DELETION_WORKER_ENABLED:
+        background_tasks.append(asyncio.create_task(run_deletion_worker()))
+    if settings.IMAGE_GC_ENABLED:
+        background_tasks.append(asyncio.create_task(run_image_gc()))
+    if settings.ARCHIVE_ENABLED:
+        background_tasks.append(asyncio.create_task(run_archiver()))
+    if settings.JOBS_ENABLED:
+        background_tasks.extend(job_runner.start())
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+
 
 app = FastAPI(
     title=settings.API_TITLE,
     description=settings.DESCRIPTION,
     version=settings.API_VERSION_1,
+    lifespan=lifespan,
 )
 
+app.add_middleware(CancelOnDisconnectMiddleware)
+app.add_middleware(AdmissionMiddleware)
+# replays skip admission control as well
+app.add_middleware(IdempotencyMiddleware)
+# outermost, so cached pages are served without taking an admission slot
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(user_router_v1, prefix=settings.API_VERSION_1_PREFIX, tags=["Users"])
 app.include_router(post_router_v1, prefix=settings.API_VERSION_1_PREFIX, tags=["Posts"])
+app.include_router(admin_router_v1, prefix=settings.API_VERSION_1_PREFIX, tags=["Admin"])
 
 
 @app.exception_handler(500)
@@ -35,15 +94,17 @@ async def internal_server_error(request, exc):
     )
 
 
+server_error_handler = create_exception_handler(
+    status_code=500,
+    initial_detail={
+        "error_code": "Server error",
+        "message": "Oops! Something went wrong",
+    },
+)
+
 app.add_exception_handler(
     exc_class_or_status_code=ServerError,
-    handler=create_exception_handler(
-        status_code=500,
-        initial_detail={
-            "error_code": "Server error",
-            "message": "Oops! Something went wrong",
-        },
-    ),
+    handler=server_error_handler,
 )
 
 app.add_exception_handler(
@@ -58,6 +119,17 @@ app.add_exception_handler(
     ),
 )
 
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidFileNameError,
+    handler=create_exception_handler(
+        status_code=400,
+        initial_detail={
+            "error_code": "Invalid file name",
+            "message": "Image names must be plain file names without a directory part",
+        },
+    ),
+)
+
 app.add_exception_handler(
     exc_class_or_status_code=PasswordError,
     handler=create_exception_handler(
@@ -138,3 +210,87 @@ app.add_exception_handler(
         },
     ),
 )
+
+app.add_exception_handler(
+    exc_class_or_status_code=BatchSizeError,
+    handler=create_exception_handler(
+        status_code=400,
+        initial_detail={
+            "error_code": "Invalid batch size",
+            "message": f"A batch must contain between 1 and {settings.MAX_BATCH_SIZE} items",
+        },
+    ),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidSortError,
+    handler=create_exception_handler(
+        status_code=400,
+        initial_detail={
+            "error_code": "Invalid sort",
+            "message": "Sort field or order is not supported",
+            "resolution": """Sort posts by created_at, title or like_count, users by username, and order by asc or desc""",
+        },
+    ),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidFollowError,
+    handler=create_exception_handler(
+        status_code=400,
+        initial_detail={
+            "error_code": "Invalid follow",
+            "message": "Users cannot follow themselves",
+        },
+    ),
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=AdminAuthError,
+    handler=create_exception_handler(
+        status_code=403,
+        initial_detail={
+            "error_code": "Forbidden",
+            "message": "Admin endpoints require a valid X-Admin-Key header",
+        },
+    ),
+)
+
+query_timeout_handler = create_exception_handler(
+    status_code=503,
+    initial_detail={
+        "error_code": "Query timeout",
+        "message": "The query took too long and was cancelled",
+        "resolution": "Narrow the request or try again later",
+    },
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=QueryTimeoutError,
+    handler=query_timeout_handler,
+)
+
+
+async def operational_error_handler(request: Request, exc: OperationalError):
+    # STATEMENT_TIMEOUTS_MS applies to every query of a request, wherever it runs
+    if isinstance(exc.orig, QueryCanceled):
+        return await query_timeout_handler(request, exc)
+    return await server_error_handler(request, exc)
+
+
+app.add_exception_handler(
+    exc_class_or_status_code=OperationalError,
+    handler=operational_error_handler,
+)
+
+app.add_exception_handler(
+    exc_class_or_status_code=InvalidCursorError,
+    handler=create_exception_handler(
+        status_code=400,
+        initial_detail={
+            "error_code": "Invalid cursor",
+            "message": "Pagination cursor is malformed or cannot be used with this sort",
+            "resolution": "Pass the cursor from the previous page unchanged, and page sorted feeds with offset",
+        },
+    ),
+)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, VARCHAR, Text, Index, UUID, Integer, DateTime, text
+
+from app.database.base import Base
+from app.database.ids import uuid7
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(
+        UUID,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
+        primary_key=True,
+    )
+    job_type = Column(VARCHAR(50), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # claiming a job moves run_at forward by the lease, so the job of a
+    # worker that died comes back once the lease runs out
+    run_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.now,
+        server_default=text("localtimestamp"),
+    )
+    failed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_jobs_job_type_run_at",
+            job_type,
+            run_at,
+            postgresql_where=failed_at.is_(None),
+        ),
+    )
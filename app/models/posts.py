@@ -1,4 +1,3 @@
-import uuid
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import TSVECTOR
@@ -12,22 +11,40 @@ from sqlalchemy import (
     DateTime,
     Computed,
     Index,
+    Integer,
+    Float,
+    text,
 )
 
-from app.database.base import Base
+from app.database.base import Base, view_metadata
+from app.database.ids import uuid7
 
 
 class Post(Base):
     __tablename__ = "posts"
 
-    id = Column(UUID, default=uuid.uuid4(), primary_key=True)
+    id = Column(
+        UUID,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
+        primary_key=True,
+    )
     user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    title = Column(VARCHAR(50), nullable=False, index=True)
+    title = Column(VARCHAR(50), nullable=False)
     content = Column(Text, nullable=False)
     content_search = Column(
         TSVECTOR, Computed("to_tsvector('english', \"content\")", persisted=True)
     )
     created_at = Column(DateTime, nullable=False)
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.now,
+        onupdate=datetime.now,
+        server_default=text("localtimestamp"),
+    )
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    deleted_at = Column(DateTime, nullable=True)
 
     user = relationship("User", back_populates="posts")
 
@@ -49,13 +66,28 @@ class Post(Base):
 
     __table_args__ = (
         Index("idx_content_search", content_search, postgresql_using="gin"),
+        Index("ix_posts_created_at_id", created_at, id),
+        Index("ix_posts_title_id", title, id),
+        Index("ix_posts_like_count_id", like_count, id),
+        Index("ix_posts_user_id_id", user_id, id),
+        Index("ix_posts_updated_at", updated_at),
+        Index(
+            "ix_posts_deleted_at",
+            deleted_at,
+            postgresql_where=deleted_at.is_not(None),
+        ),
     )
 
 
 class Image(Base):
     __tablename__ = "images"
 
-    id = Column(UUID, default=uuid.uuid4(), primary_key=True)
+    id = Column(
+        UUID,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
+        primary_key=True,
+    )
     image_url = Column(Text, nullable=False, index=True)
 
     posts = relationship(
@@ -68,21 +100,124 @@ class Image(Base):
 class Like(Base):
     __tablename__ = "likes"
 
-    post_id = Column(UUID, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
-    user_id = Column(UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
-    liked_at = Column(DateTime, default=datetime.now(), nullable=False)
+    post_id = Column(
+        UUID,
+        ForeignKey("posts.id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    )
+    user_id = Column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    liked_at = Column(DateTime, default=datetime.now, nullable=False, index=True)
 
     user = relationship("User", back_populates="likes")
     post = relationship("Post", back_populates="likes")
 
+    # hash partitioned by post_id into 16 partitions, which the migration
+    # creates; every primary key and post_id lookup touches one partition
+    __table_args__ = (
+        Index("ix_likes_user_id_liked_at_post_id", user_id, liked_at, post_id),
+        {"postgresql_partition_by": "HASH (post_id)"},
+    )
+
 
 post_image = Table(
     "post_images",
     Base.metadata,
     Column(
-        "post_id", UUID, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+        "post_id",
+        UUID,
+        ForeignKey("posts.id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "image_id",
+        UUID,
+        ForeignKey("images.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+)
+
+
+class TimelineEntry(Base):
+    __tablename__ = "home_timelines"
+
+    # post ids are UUIDv7, so (user_id, post_id) orders a timeline by time
+    user_id = Column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    post_id = Column(
+        UUID,
+        ForeignKey("posts.id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+
+# cold tier: posts past ARCHIVE_AFTER_DAYS are moved here with their likes
+# and image links by app/tasks/archive.py, keeping posts and its GIN index small
+posts_archive = Table(
+    "posts_archive",
+    Base.metadata,
+    Column("id", UUID, primary_key=True),
+    Column("user_id", UUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+    Column("title", VARCHAR(50), nullable=False),
+    Column("content", Text, nullable=False),
+    Column(
+        "content_search",
+        TSVECTOR,
+        Computed("to_tsvector('english', \"content\")", persisted=True),
+    ),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime, nullable=False),
+    Column("like_count", Integer, nullable=False),
+    Column("archived_at", DateTime, nullable=False, server_default=text("localtimestamp")),
+    Index("idx_posts_archive_content_search", "content_search", postgresql_using="gin"),
+    Index("ix_posts_archive_user_id_id", "user_id", "id"),
+)
+
+likes_archive = Table(
+    "likes_archive",
+    Base.metadata,
+    Column(
+        "post_id",
+        UUID,
+        ForeignKey("posts_archive.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column(
+        "user_id",
+        UUID,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    ),
+    Column("liked_at", DateTime, nullable=False),
+)
+
+post_images_archive = Table(
+    "post_images_archive",
+    Base.metadata,
+    Column(
+        "post_id",
+        UUID,
+        ForeignKey("posts_archive.id", ondelete="CASCADE"),
+        primary_key=True,
     ),
     Column(
-        "image_id", UUID, ForeignKey("images.id", ondelete="CASCADE"), primary_key=True
+        "image_id",
+        UUID,
+        ForeignKey("images.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
     ),
 )
+
+
+trending_posts = Table(
+    "trending_posts",
+    view_metadata,
+    Column("post_id", UUID, primary_key=True),
+    Column("score", Float, nullable=False),
+)
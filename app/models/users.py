@@ -1,17 +1,43 @@
-import uuid
+from datetime import datetime
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, VARCHAR, Text, Index, UUID
+from sqlalchemy import (
+    Column,
+    VARCHAR,
+    Text,
+    Index,
+    UUID,
+    Integer,
+    DateTime,
+    ForeignKey,
+    CheckConstraint,
+    text,
+)
 
 from app.database.base import Base
+from app.database.ids import uuid7
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID, default=uuid.uuid4(), primary_key=True)
+    id = Column(
+        UUID,
+        default=uuid7,
+        server_default=text("uuid_generate_v7()"),
+        primary_key=True,
+    )
     username = Column(VARCHAR(50), nullable=False)
     email = Column(VARCHAR(50), unique=True, nullable=False, index=True)
     password = Column(Text, nullable=False)
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.now,
+        onupdate=datetime.now,
+        server_default=text("localtimestamp"),
+    )
+    deleted_at = Column(DateTime, nullable=True)
 
     posts = relationship(
         "Post",
@@ -35,4 +61,28 @@ class User(Base):
             postgresql_using="gin",
             postgresql_ops={"username": "gin_trgm_ops"},
         ),
+        Index("ix_users_username_id", username, id),
+        Index("ix_users_updated_at", updated_at),
+        Index(
+            "ix_users_deleted_at",
+            deleted_at,
+            postgresql_where=deleted_at.is_not(None),
+        ),
+    )
+
+
+class Follow(Base):
+    __tablename__ = "follows"
+
+    follower_id = Column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    followee_id = Column(
+        UUID, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    followed_at = Column(DateTime, default=datetime.now, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint("follower_id <> followee_id", name="ck_follows_not_self"),
+        Index("ix_follows_followee_id_follower_id", followee_id, follower_id),
     )
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+from typing import Literal
+from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, Request
+
+from app.schemas.posts import Response
+from app.core.tracing import TracedRoute
+from app.core.admission import admission_stats
+from app.utils import get_db, require_admin
+from app.services.exports import export_service
+from app.services.imports import import_service
+from app.tasks import image_gc
+from app.tasks.jobs import job_stats
+
+admin_router_v1 = APIRouter(route_class=TracedRoute, dependencies=[Depends(require_admin)])
+
+
+@admin_router_v1.get("/admin/export/{entity}/", status_code=200, response_class=StreamingResponse)
+async def export_entity(
+    entity: Literal["posts", "users", "likes"],
+    updated_since: datetime = Query(
+        default=None, description="only rows created or updated at or after this time"
+    ),
+    gzip: bool = Query(default=False, description="gzip the NDJSON stream"),
+):
+    filename = f"{entity}.ndjson.gz" if gzip else f"{entity}.ndjson"
+    return StreamingResponse(
+        export_service.export_ndjson(entity, updated_since, gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@admin_router_v1.post("/admin/import/posts/", status_code=200, response_model=Response)
+async def import_posts(request: Request, db: Session = Depends(get_db)):
+    report = await import_service.import_posts(request.stream(), db)
+    return Response(message="Posts imported", data=report)
+
+
+@admin_router_v1.post("/admin/import/likes/", status_code=200, response_model=Response)
+async def import_likes(request: Request, db: Session = Depends(get_db)):
+    report = await import_service.import_likes(request.stream(), db)
+    return Response(message="Likes imported", data=report)
+
+
+@admin_router_v1.get("/admin/images/gc/", status_code=200, response_model=Response)
+async def get_image_gc_report():
+    report = image_gc.last_report
+    return Response(
+        message="Last image collection",
+        data=report.to_json() if report else None,
+    )
+
+
+@admin_router_v1.post("/admin/images/gc/", status_code=200, response_model=Response)
+async def collect_images():
+    report = await asyncio.to_thread(image_gc.collect_orphaned_images)
+    if not report:
+        return Response(message="Image collection already running", data=None)
+    return Response(message="Orphaned images collected", data=report.to_json())
+
+
+@admin_router_v1.get("/admin/admission/", status_code=200, response_model=Response)
+async def get_admission_stats():
+    return Response(message="Admission control per route group", data=admission_stats())
+
+
+@admin_router_v1.get("/admin/jobs/", status_code=200, response_model=Response)
+async def get_job_stats():
+    return Response(message="Background jobs per job type", data=job_stats())
@@ -1,13 +1,23 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
-from fastapi import APIRouter, Depends, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Query, UploadFile, File, Request
 
+from app.core.tracing import TracedRoute
+from app.core.responses import ImageResponse
 from app.services.posts import post_service
-from app.utils import get_db, post_to_json
-from app.schemas.posts import PostCreateV1, PostUpdateV1, LikeCreate, Response
+from app.services.events import event_broker
+from app.utils import get_db
+from app.schemas.posts import (
+    PostCreateV1,
+    PostUpdateV1,
+    PostBatchV1,
+    LikeCreate,
+    LikeBatchCreate,
+    Response,
+)
 
-post_router_v1 = APIRouter()
+post_router_v1 = APIRouter(route_class=TracedRoute)
 
 
 create_post_desc = """
@@ -18,14 +28,17 @@ and send name as the image attribute value in PostCreateV1 model
 @post_router_v1.get("/posts/feed/", status_code=200, response_model=Response)
 async def get_posts(
     sort: str = Query(
-        default=None, description="sort by date created(e.g sort=created_at)"
+        default=None, description="sort by created_at, title, like_count or trending"
     ),
     order: str = Query(default=None, description="order in asc or desc"),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
+    after: UUID = Query(
+        default=None, description="id of the last post on the previous page"
+    ),
     db: Session = Depends(get_db),
 ):
-    posts = await post_service.get_posts(offset, limit, db, sort, order)
+    posts = await post_service.get_posts(offset, limit, db, sort, order, after)
     return Response(message="Feed loaded successfully", data=posts)
 
 
@@ -33,27 +46,59 @@ async def get_posts(
 async def search_posts(
     q: str = Query(..., description="search posts with title"),
     sort: str = Query(
-        default=None, description="sort by date created(e.g sort=created_at)"
+        default=None, description="sort by created_at, title or like_count"
     ),
     order: str = Query(default=None, description="order in asc or desc"),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
+    include_archived: bool = Query(
+        default=False, description="also search posts moved to the archive"
+    ),
     db: Session = Depends(get_db),
 ):
-    posts = await post_service.search_posts(q, offset, limit, db, sort, order)
+    posts = await post_service.search_posts(
+        q, offset, limit, db, sort, order, include_archived
+    )
+    return Response(message="Posts retrieved successfully", data=posts)
+
+
+@post_router_v1.get("/posts/stream/", status_code=200, response_class=StreamingResponse)
+async def stream_feed_events(request: Request):
+    return StreamingResponse(
+        event_broker.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@post_router_v1.post("/posts/batch/", status_code=200, response_model=Response)
+async def get_posts_by_ids(post_batch: PostBatchV1, db: Session = Depends(get_db)):
+    posts = await post_service.get_posts_by_ids(post_batch.ids, db)
     return Response(message="Posts retrieved successfully", data=posts)
 
 
+@post_router_v1.post("/posts/batch/like/", status_code=200, response_model=Response)
+async def like_posts(like_batch: LikeBatchCreate, db: Session = Depends(get_db)):
+    likes = await post_service.like_posts(like_batch, db)
+    return Response(message="Posts liked successfully", data=likes)
+
+
+@post_router_v1.post("/posts/batch/unlike/", status_code=200, response_model=Response)
+async def unlike_posts(like_batch: LikeBatchCreate, db: Session = Depends(get_db)):
+    likes = await post_service.unlike_posts(like_batch, db)
+    return Response(message="Posts unliked successfully", data=likes)
+
+
 @post_router_v1.get("/posts/{post_id}/", status_code=200, response_model=Response)
 async def get_post_by_id(post_id: UUID, db: Session = Depends(get_db)):
     post = await post_service.get_post_by_id(post_id, db)
     return Response(message="Post retrieved successfully", data=post)
 
 
-@post_router_v1.get("/posts/{post_id}/images/{image_url}/load/", status_code=200, response_class=FileResponse)
+@post_router_v1.get("/posts/{post_id}/images/{image_url}/load/", status_code=200, response_class=ImageResponse)
 async def get_post_image(post_id: UUID, image_url: str, db: Session = Depends(get_db)):
     file_path = await post_service.load_image(post_id, image_url, db)
-    return FileResponse(path=file_path)
+    return ImageResponse(path=file_path)
 
 
 @post_router_v1.post(
@@ -63,8 +108,7 @@ async def get_post_image(post_id: UUID, image_url: str, db: Session = Depends(ge
     description=create_post_desc,
 )
 async def create_post(post_create: PostCreateV1, db: Session = Depends(get_db)):
-    post_db = await post_service.create_post(post_create, db)
-    post = post_to_json(post_db)
+    post = await post_service.create_post(post_create, db)
     return Response(message="Post created successfully", data=post)
 
 
@@ -105,6 +149,12 @@ async def delete_image(post_id: UUID, image_name: str, db: Session = Depends(get
 
 
 @post_router_v1.delete("/posts/{post_id}/", status_code=204)
-async def delete_post(post_id: UUID, db: Session = Depends(get_db)):
-    await post_service.delete_post(post_id, db)
+async def delete_post(
+    post_id: UUID,
+    background: bool = Query(
+        default=False, description="hide now and purge likes and images in the background"
+    ),
+    db: Session = Depends(get_db),
+):
+    await post_service.delete_post(post_id, db, background)
     return Response(message="Post deleted successfully")
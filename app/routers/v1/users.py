@@ -2,11 +2,20 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 from fastapi import APIRouter, Depends, Query
 
+from app.core.tracing import TracedRoute
 from app.services.users import user_service
+from app.services.posts import post_service
 from app.utils import get_db, users_to_json, user_to_json
-from app.schemas.users import UserCreateV1, UserUpdateV1, Response
+from app.schemas.users import (
+    UserCreateV1,
+    UserUpdateV1,
+    UserBatchV1,
+    FollowCreate,
+    Response,
+    PageResponse,
+)
 
-user_router_v1 = APIRouter()
+user_router_v1 = APIRouter(route_class=TracedRoute)
 
 @user_router_v1.get("/users/search/", status_code=200, response_model=Response)
 async def search_users(
@@ -33,6 +42,12 @@ async def get_users(
     return Response(message="Users retrieved successfully", data=users_out)
 
 
+@user_router_v1.post("/users/batch/", status_code=200, response_model=Response)
+async def get_users_by_ids(user_batch: UserBatchV1, db: Session = Depends(get_db)):
+    users = await user_service.get_users_by_ids(user_batch.ids, db)
+    return Response(message="Users retrieved successfully", data=users)
+
+
 @user_router_v1.get("/users/{user_id}/", status_code=200, response_model=Response)
 async def get_user_by_id(user_id: UUID, db: Session = Depends(get_db)):
     user_db = await user_service.get_user_by_id(user_id, db)
@@ -40,11 +55,31 @@ async def get_user_by_id(user_id: UUID, db: Session = Depends(get_db)):
     return Response(message="User retrieved successfully", data=user)
 
 
-@user_router_v1.get("/users/{user_id}/likes/", status_code=200, response_model=Response)
-async def get_user_likes(user_id: UUID, db: Session = Depends(get_db)):
-    posts = await user_service.get_user_likes(user_id, db)
-    return Response(message="Liked posts retrieved successfully", data=posts)
-
+@user_router_v1.get("/users/{user_id}/likes/", status_code=200, response_model=PageResponse)
+async def get_user_likes(
+    user_id: UUID,
+    cursor: str = Query(
+        default=None, description="next_cursor returned with the previous page"
+    ),
+    limit: int = Query(default=10, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    posts, next_cursor = await post_service.get_liked_posts(user_id, limit, db, cursor)
+    return PageResponse(
+        message="Liked posts retrieved successfully", data=posts, next_cursor=next_cursor
+    )
+
+@user_router_v1.get("/users/{user_id}/timeline/", status_code=200, response_model=Response)
+async def get_home_timeline(
+    user_id: UUID,
+    before: UUID = Query(
+        default=None, description="id of the last post on the previous page"
+    ),
+    limit: int = Query(default=10),
+    db: Session = Depends(get_db),
+):
+    posts = await post_service.get_home_timeline(user_id, limit, db, before)
+    return Response(message="Timeline loaded successfully", data=posts)
 
 
 @user_router_v1.post("/users/", status_code=201, response_model=Response)
@@ -54,6 +89,14 @@ async def create_user(user_create: UserCreateV1, db: Session = Depends(get_db)):
     return Response(message="User created successfully", data=user)
 
 
+@user_router_v1.post("/users/{user_id}/follow/", status_code=201, response_model=Response)
+async def follow_user(
+    user_id: UUID, follow_create: FollowCreate, db: Session = Depends(get_db)
+):
+    follow = await user_service.follow_user(user_id, follow_create, db)
+    return Response(message="User followed successfully", data=follow)
+
+
 @user_router_v1.patch("/users/{user_id}/", status_code=200, response_model=Response)
 async def update_user(
     user_id: UUID, user_update: UserUpdateV1, db: Session = Depends(get_db)
@@ -63,7 +106,19 @@ async def update_user(
     return Response(message="User updated successfully", data=user)
 
 
+@user_router_v1.delete("/users/{user_id}/follow/{follower_id}/", status_code=204)
+async def unfollow_user(user_id: UUID, follower_id: UUID, db: Session = Depends(get_db)):
+    await user_service.unfollow_user(user_id, follower_id, db)
+    return Response(message="User unfollowed successfully")
+
+
 @user_router_v1.delete("/users/{user_id}/", status_code=204)
-async def delete_user(user_id: UUID, db: Session = Depends(get_db)):
-    await user_service.delete_user(user_id, db)
+async def delete_user(
+    user_id: UUID,
+    background: bool = Query(
+        default=False, description="hide now and purge posts and likes in the background"
+    ),
+    db: Session = Depends(get_db),
+):
+    await user_service.delete_user(user_id, db, background)
     return Response(message="User deleted successfully")
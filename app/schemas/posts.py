@@ -1,24 +1,49 @@
 from uuid import UUID
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 
+from app.utils import is_file_name
+
 class PostBaseV1(BaseModel):
     username: str
     title: str
     content: str
     image: Optional[list] = None
 
+    @field_validator("image")
+    @classmethod
+    def image_names(cls, value):
+        # names are joined onto the upload directory when loaded and deleted
+        if value and not all(is_file_name(name) for name in value):
+            raise ValueError("image names must be plain file names without a directory part")
+        return value
+
 class PostInDBV1(PostBaseV1):
     created_at: datetime
 
 class PostCreateV1(PostBaseV1):
     pass
 
+class PostImportV1(PostBaseV1):
+    created_at: Optional[datetime] = None
+
 class LikeCreate(BaseModel):
     user_id: UUID
     post_title: str
 
+class LikeBatchCreate(BaseModel):
+    user_id: UUID
+    post_ids: list[UUID]
+
+class LikeImportV1(BaseModel):
+    post_id: UUID
+    user_id: UUID
+    liked_at: Optional[datetime] = None
+
+class PostBatchV1(BaseModel):
+    ids: list[UUID]
+
 class PostUpdateV1(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
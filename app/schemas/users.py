@@ -21,6 +21,15 @@ class UserUpdateV1(BaseModel):
     username: Optional[str] = None
     email: Optional[str] = None
 
+class FollowCreate(BaseModel):
+    follower_id: UUID
+
+class UserBatchV1(BaseModel):
+    ids: list[UUID]
+
 class Response(BaseModel):
     message: str
     data: Optional[dict | list[dict]] = None
+
+class PageResponse(Response):
+    next_cursor: Optional[str] = None
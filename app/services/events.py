@@ -0,0 +1,94 @@
+import json
+import asyncio
+from uuid import UUID
+from typing import AsyncIterator
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+RESYNC_EVENT = format_event("resync", {"reason": "stream fell behind, reload the feed"})
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue: asyncio.Queue[str] = asyncio.Queue(
+            maxsize=settings.EVENTS_SUBSCRIBER_QUEUE_SIZE
+        )
+
+    def send(self, events: list[str]):
+        for event in events:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # a slow consumer loses its backlog and is told to refetch
+                # instead of holding an ever growing queue in memory
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.queue.put_nowait(RESYNC_EVENT)
+                return
+
+
+class EventBroker:
+    '''Fans write-path events out to SSE subscribers of this process once per tick'''
+
+    def __init__(self):
+        self.subscribers: set[Subscriber] = set()
+        self.pending_posts: list[dict] = []
+        self.pending_likes: dict[str, int] = {}
+
+    def publish_post(self, post: dict):
+        self.pending_posts.append(post)
+        del self.pending_posts[: -settings.EVENTS_MAX_POSTS_PER_TICK]
+
+    def publish_like(self, post_id: UUID, delta: int):
+        key = str(post_id)
+        self.pending_likes[key] = self.pending_likes.get(key, 0) + delta
+
+    def flush(self):
+        posts, self.pending_posts = self.pending_posts, []
+        likes, self.pending_likes = self.pending_likes, {}
+
+        if not self.subscribers:
+            return
+
+        # serialized once per tick and shared by every connection
+        events = []
+        if posts:
+            events.append(format_event("posts", posts))
+        likes = {post_id: delta for post_id, delta in likes.items() if delta}
+        if likes:
+            events.append(format_event("likes", likes))
+
+        if events:
+            for subscriber in list(self.subscribers):
+                subscriber.send(events)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.EVENTS_TICK_SECONDS)
+            self.flush()
+
+    async def stream(self, request: Request) -> AsyncIterator[str]:
+        subscriber = Subscriber()
+        self.subscribers.add(subscriber)
+
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+        finally:
+            self.subscribers.discard(subscriber)
+
+
+event_broker = EventBroker()
@@ -0,0 +1,210 @@
+from datetime import datetime
+from pydantic import BaseModel, ValidationError
+from typing import AsyncIterator, Callable
+from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, any_
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models.users import User
+from app.database.ids import uuid7
+from app.core.config import settings
+from app.utils import uuid_array
+from app.core.tracing import trace_methods
+from app.models.posts import Post, Image, Like, post_image
+from app.schemas.posts import PostImportV1, LikeImportV1
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def to_json(self) -> dict:
+        return {
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+async def ndjson_chunks(
+    byte_chunks: AsyncIterator[bytes], model: type[BaseModel], report: ImportReport
+) -> AsyncIterator[list[tuple[int, BaseModel]]]:
+    '''Split a byte stream into validated rows, grouped into IMPORT_CHUNK_SIZE batches'''
+    buffer = b""
+    line_no = 0
+    rows = []
+
+    def parse(line: bytes):
+        nonlocal line_no
+        line_no += 1
+        if not line.strip():
+            return
+        try:
+            rows.append((line_no, model.model_validate_json(line)))
+        except ValidationError as e:
+            report.error(line_no, str(e.errors(include_url=False)[0]["msg"]))
+
+    async for data in byte_chunks:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            parse(line)
+        if len(rows) >= settings.IMPORT_CHUNK_SIZE:
+            yield rows
+            rows = []
+
+    parse(buffer)
+    if rows:
+        yield rows
+
+
+def write_chunk(
+    db: Session,
+    rows: list[tuple[int, BaseModel]],
+    write: Callable[[Session, list[tuple[int, BaseModel]]], int],
+    report: ImportReport,
+):
+    '''Write a chunk in one transaction, retrying row by row if any row fails'''
+    try:
+        report.inserted += write(db, rows)
+        db.commit()
+        return
+    except Exception:
+        db.rollback()
+
+    for row in rows:
+        try:
+            with db.begin_nested():
+                report.inserted += write(db, [row])
+        except Exception as e:
+            report.error(row[0], str(getattr(e, "orig", e)).splitlines()[0])
+    db.commit()
+
+
+@trace_methods
+class ImportService:
+    async def import_posts(self, byte_chunks: AsyncIterator[bytes], db: Session) -> dict:
+        report = ImportReport()
+
+        # parsing stays on the loop; each chunk's queries and writes run on
+        # a worker thread so other requests keep being served
+        async for rows in ndjson_chunks(byte_chunks, PostImportV1, report):
+            await run_in_threadpool(self._import_posts_chunk, db, rows, report)
+
+        return report.to_json()
+
+    async def import_likes(self, byte_chunks: AsyncIterator[bytes], db: Session) -> dict:
+        report = ImportReport()
+
+        async for rows in ndjson_chunks(byte_chunks, LikeImportV1, report):
+            await run_in_threadpool(self._import_likes_chunk, db, rows, report)
+
+        return report.to_json()
+
+    def _import_posts_chunk(self, db: Session, rows, report: ImportReport):
+        usernames = {post.username for _, post in rows}
+        user_ids = {}
+        for username, user_id in db.execute(
+            select(User.username, User.id).where(User.username.in_(usernames))
+        ):
+            user_ids.setdefault(username, user_id)
+
+        known_rows = []
+        for line_no, post in rows:
+            if post.username in user_ids:
+                known_rows.append((line_no, post))
+            else:
+                report.error(line_no, f"user {post.username!r} is not signed up")
+
+        if known_rows:
+            write_chunk(
+                db,
+                known_rows,
+                lambda db, chunk: self._insert_posts(db, chunk, user_ids),
+                report,
+            )
+
+    def _import_likes_chunk(self, db: Session, rows, report: ImportReport):
+        post_ids = set(
+            db.scalars(
+                select(Post.id).where(
+                    Post.id == any_(uuid_array({like.post_id for _, like in rows}))
+                )
+            )
+        )
+        user_ids = set(
+            db.scalars(
+                select(User.id).where(
+                    User.id == any_(uuid_array({like.user_id for _, like in rows}))
+                )
+            )
+        )
+
+        known_rows = []
+        for line_no, like in rows:
+            if like.post_id not in post_ids:
+                report.error(line_no, f"post {like.post_id} not found")
+            elif like.user_id not in user_ids:
+                report.error(line_no, f"user {like.user_id} not found")
+            else:
+                known_rows.append((line_no, like))
+
+        if known_rows:
+            written = report.inserted + report.failed
+            write_chunk(db, known_rows, self._insert_likes, report)
+            # rows neither inserted nor failed were already liked
+            report.skipped += len(known_rows) - (
+                report.inserted + report.failed - written
+            )
+
+    def _insert_posts(self, db: Session, rows, user_ids: dict) -> int:
+        now = datetime.now()
+        posts, images, post_images = [], [], []
+
+        for _, post in rows:
+            post_id = uuid7()
+            posts.append(
+                {
+                    "id": post_id,
+                    "user_id": user_ids[post.username],
+                    "title": post.title,
+                    "content": post.content,
+                    "created_at": post.created_at or now,
+                }
+            )
+            for image_url in dict.fromkeys(post.image or []):
+                image_id = uuid7()
+                images.append({"id": image_id, "image_url": image_url})
+                post_images.append({"post_id": post_id, "image_id": image_id})
+
+        # executemany with insertmanyvalues sends multi-row INSERT statements
+        db.execute(insert(Post), posts)
+        if images:
+            db.execute(insert(Image), images)
+            db.execute(insert(post_image), post_images)
+        return len(posts)
+
+    def _insert_likes(self, db: Session, rows) -> int:
+        now = datetime.now()
+        likes = [
+            {"post_id": like.post_id, "user_id": like.user_id, "liked_at": like.liked_at or now}
+            for _, like in rows
+        ]
+
+        inserted = db.execute(
+            insert(Like).on_conflict_do_nothing().returning(Like.post_id), likes
+        ).all()
+        return len(inserted)
+
+
+import_service = ImportService()
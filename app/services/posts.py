@@ -1,24 +1,279 @@
-from uuid import UUID, uuid4
+from uuid import UUID
+from functools import lru_cache
 from datetime import datetime
 from fastapi import UploadFile
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import (
+    func,
+    any_,
+    select,
+    update,
+    delete,
+    literal,
+    values,
+    column,
+    true,
+    union,
+    union_all,
+    tuple_,
+    bindparam,
+    Text,
+)
+from sqlalchemy import UUID as SA_UUID
 
-from app.models.users import User
+from app.core.config import settings
+from app.models.users import User, Follow
+from app.database.ids import uuid7
+from app.core.tracing import trace_methods
 from app.services.users import user_service
-from app.models.posts import Post, Image, Like
-from app.schemas.posts import PostCreateV1, PostUpdateV1, PostInDBV1, LikeCreate
-from app.utils import post_to_json, generate_file_path, write_file, delete_file, like_to_json
+from app.services.events import event_broker
+from app.services.sorting import POST_SORTS, sort_clauses
+from app.tasks.jobs import job_runner
+from app.tasks.timeline import fan_out_job
+from app.tasks.image_gc import delete_unreferenced_files
+from app.models.posts import (
+    Post,
+    Image,
+    Like,
+    TimelineEntry,
+    post_image,
+    trending_posts,
+    posts_archive,
+    post_images_archive,
+)
+from app.schemas.posts import (
+    PostCreateV1,
+    PostUpdateV1,
+    PostInDBV1,
+    LikeCreate,
+    LikeBatchCreate,
+)
+from app.utils import (
+    check_batch_size,
+    uuid_array,
+    post_row_to_json,
+    post_with_relations_to_json,
+    generate_file_path,
+    write_file,
+    like_to_json,
+    run_cancellable,
+    encode_cursor,
+    decode_cursor,
+)
 from app.core.exceptions import (
     PostNotFoundError,
     PostsNotFoundError,
     UserNotSignedUpError,
     UserNotFoundError,
     ServerError,
-    InvalidImageUrlError
+    InvalidImageUrlError,
+    InvalidCursorError,
+)
+
+POST_COLUMNS = (Post.id, Post.user_id, Post.title, Post.content, Post.created_at)
+
+
+def post_image_urls(post_id):
+    return (
+        select(func.array_agg(Image.image_url))
+        .join(post_image, post_image.c.image_id == Image.id)
+        .where(post_image.c.post_id == post_id)
+        .correlate_except(Image, post_image)
+        .scalar_subquery()
+    )
+
+
+def archived_image_urls(post_id):
+    return (
+        select(func.array_agg(Image.image_url))
+        .join(post_images_archive, post_images_archive.c.image_id == Image.id)
+        .where(post_images_archive.c.post_id == post_id)
+        .correlate_except(Image, post_images_archive)
+        .scalar_subquery()
+    )
+
+
+def search_columns(table) -> list:
+    return [
+        table.c.id,
+        table.c.user_id,
+        table.c.title,
+        table.c.content,
+        table.c.created_at,
+        table.c.updated_at,
+        table.c.like_count,
+        func.ts_rank(table.c.content_search, query_search).label("rank"),
+    ]
+
+
+# Hot statements are built once per shape (sort, order, paging) and bound per
+# call, so a request skips rebuilding the construct and its cache key; psycopg
+# then prepares them server-side, see DATABASE_PREPARE_THRESHOLD.
+query_search = func.websearch_to_tsquery("english", bindparam("q", type_=Text))
+
+
+def paged(stmt):
+    return stmt.offset(bindparam("offset")).limit(bindparam("limit"))
+
+
+@lru_cache
+def feed_statement(sort: str | None, order: str | None, after: bool):
+    stmt = select(Post).options(selectinload(Post.images))
+
+    if sort == "trending":
+        # scores are precomputed by the trending refresher, see app/tasks/trending.py
+        stmt = stmt.join(
+            trending_posts, trending_posts.c.post_id == Post.id
+        ).order_by(trending_posts.c.score.desc(), trending_posts.c.post_id)
+    elif sort:
+        stmt = stmt.order_by(*sort_clauses(POST_SORTS, sort, order))
+    else:
+        # ids are UUIDv7, so id order is creation order and the primary
+        # key index serves the page without an OFFSET scan; get_posts
+        # rejects after together with sort
+        stmt = stmt.order_by(Post.id.desc())
+        if after:
+            stmt = stmt.where(Post.id < bindparam("after"))
+
+    return paged(stmt)
+
+
+@lru_cache
+def search_statement(sort: str | None, order: str | None):
+    stmt = (
+        select(Post)
+        .options(selectinload(Post.images))
+        .where(Post.content_search.op("@@")(query_search))
+    )
+
+    if sort:
+        stmt = stmt.order_by(*sort_clauses(POST_SORTS, sort, order))
+    else:
+        rank_search = func.ts_rank(Post.content_search, query_search)
+        stmt = stmt.order_by(rank_search.desc(), Post.id)
+
+    return paged(stmt)
+
+
+@lru_cache
+def archive_search_statement(sort: str | None, order: str | None):
+    # both tiers are searched through their own GIN index and merged;
+    # archived posts of soft-deleted users stay hidden until purged
+    hot = select(*search_columns(Post.__table__)).where(
+        Post.content_search.op("@@")(query_search), Post.deleted_at.is_(None)
+    )
+    cold = (
+        select(*search_columns(posts_archive))
+        .join(User, User.id == posts_archive.c.user_id)
+        .where(
+            posts_archive.c.content_search.op("@@")(query_search),
+            User.deleted_at.is_(None),
+        )
+    )
+    results = union_all(hot, cold).subquery("results")
+
+    if sort:
+        sorts = {name: (results.c[name], results.c.id) for name in POST_SORTS}
+        order_by = sort_clauses(sorts, sort, order)
+    else:
+        order_by = [results.c.rank.desc(), results.c.id]
+
+    # image urls are only looked up for the page; ids are unique across
+    # the tiers, so at most one of the two subqueries finds links
+    stmt = select(
+        results.c.id,
+        results.c.user_id,
+        results.c.title,
+        results.c.content,
+        results.c.created_at,
+        results.c.updated_at,
+        results.c.like_count.label("likes"),
+        func.coalesce(
+            post_image_urls(results.c.id), archived_image_urls(results.c.id)
+        ).label("images"),
+    ).order_by(*order_by)
+
+    return paged(stmt)
+
+
+LIKE_BY_KEY = select(Like).where(
+    Like.post_id == bindparam("post_id"), Like.user_id == bindparam("user_id")
 )
 
 
+def like_insert(post_id: UUID, user_id: UUID):
+    # selecting the post keeps likes off soft-deleted posts, which the
+    # foreign key alone would accept
+    return (
+        insert(Like)
+        .from_select(
+            ["post_id", "user_id", "liked_at"],
+            select(Post.id, literal(user_id, SA_UUID), literal(datetime.now())).where(
+                Post.id == post_id, Post.deleted_at.is_(None)
+            ),
+        )
+        .on_conflict_do_nothing(index_elements=[Like.post_id, Like.user_id])
+        .returning(Like)
+    )
+
+
+def post_insert(post_db: PostInDBV1, user_id: UUID, image_urls: list[str]):
+    # the post insert and image inserts run as one statement; selecting
+    # the cached id from users means no row comes back if the user has
+    # been deleted or renamed since it was cached
+    new_post = (
+        insert(Post)
+        .from_select(
+            ["id", "user_id", "title", "content", "created_at"],
+            select(
+                literal(uuid7(), SA_UUID),
+                User.id,
+                literal(post_db.title, Text),
+                literal(post_db.content, Text),
+                literal(post_db.created_at),
+            ).where(
+                User.id == user_id,
+                User.username == post_db.username,
+                User.deleted_at.is_(None),
+            ),
+        )
+        .returning(*POST_COLUMNS)
+        .cte("new_post")
+    )
+    stmt = select(new_post, User.follower_count).join(
+        User, User.id == new_post.c.user_id
+    )
+
+    if image_urls:
+        image_rows = values(
+            column("id", SA_UUID), column("image_url", Text), name="image_rows"
+        ).data([(uuid7(), url) for url in image_urls])
+        new_images = (
+            insert(Image)
+            .from_select(
+                ["id", "image_url"],
+                select(image_rows.c.id, image_rows.c.image_url).join(
+                    new_post, true()
+                ),
+            )
+            .returning(Image.id)
+            .cte("new_images")
+        )
+        new_post_images = insert(post_image).from_select(
+            ["post_id", "image_id"], select(new_post.c.id, new_images.c.id)
+        )
+        stmt = stmt.add_cte(new_post_images.cte("new_post_images"))
+    return stmt
+
+
+def constraint_name(error: IntegrityError) -> str:
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) or ""
+
+
+@trace_methods
 class PostService:
     async def get_posts(
         self,
@@ -27,41 +282,21 @@ class PostService:
         db: Session,
         sort: str | None = None,
         order: str | None = None,
+        after: UUID | None = None,
     ) -> list[Post]:
-        is_sort = False
-        if sort:
-            if order == "desc":
-                sort_cte = db.query(Post).order_by(desc(sort)).cte("sort_cte")
-            else:
-                sort_cte = db.query(Post).order_by(sort).cte("sort_cte")
-            is_sort = True
-
-        if is_sort:
-            feed_posts_db = (
-                db.query(Post)
-                .join(sort_cte, Post.id == sort_cte.c.id)
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
-        else:
-            feed_posts_db = db.query(Post).offset(offset).limit(limit).all()
+        # after is a position in id order, which a sorted feed does not follow
+        if sort and after is not None:
+            raise InvalidCursorError()
 
-        if not feed_posts_db:
-            raise PostsNotFoundError()
+        stmt = feed_statement(sort, order, after is not None)
+        params = {"offset": offset, "limit": limit, "after": after}
 
-        feed_posts = []
-        for p in feed_posts_db:
-            post = post_to_json(p)
-            post["images"] = []
-            post["likes"] = len(p.likes)
+        feed_posts_db = db.scalars(stmt, params).all()
 
-            if p.images:
-                for img in p.images:
-                    post["images"].append(img.image_url)
-            feed_posts.append(post)
+        if not feed_posts_db:
+            raise PostsNotFoundError()
 
-        return feed_posts
+        return [post_with_relations_to_json(p) for p in feed_posts_db]
 
     async def search_posts(
         self,
@@ -71,127 +306,242 @@ class PostService:
         db: Session,
         sort: str | None = None,
         order: str | None = None,
+        include_archived: bool = False,
     ) -> list[Post]:
-        query_search = func.websearch_to_tsquery("english", q)
-        rank_search = func.ts_rank(Post.content_search, query_search).label(
-            "rank_search"
-        )
+        params = {"q": q, "offset": offset, "limit": limit}
 
-        search_cte = (
-            db.query(Post, rank_search)
-            .filter(Post.content_search.op("@@")(query_search))
-            .order_by(rank_search.desc())
-            .cte("search_cte")
-        )
+        if include_archived:
+            stmt = archive_search_statement(sort, order)
+            search_posts = await run_cancellable(lambda: db.execute(stmt, params).all())
+            if not search_posts:
+                raise PostsNotFoundError()
+            return [post_row_to_json(row) for row in search_posts]
 
-        is_sort = False
-        if sort:
-            if order == "desc":
-                sort_cte = db.query(search_cte).order_by(desc(sort)).cte("sort_cte")
-            else:
-                sort_cte = db.query(Post).order_by(sort).cte("sort_cte")
-            is_sort = True
-
-        if is_sort:
-            search_posts = (
-                db.query(Post)
-                .join(sort_cte, Post.id == sort_cte.c.id)
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
-        else:
-            search_posts = (
-                db.query(Post)
-                .join(search_cte, Post.id == search_cte.c.id)
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
+        stmt = search_statement(sort, order)
+        search_posts = await run_cancellable(lambda: db.scalars(stmt, params).all())
 
         if not search_posts:
             raise PostsNotFoundError()
 
-        posts = []
-        for p in search_posts:
-            post = post_to_json(p)
-            post["images"] = []
-            post["likes"] = len(p.likes)
-
-            if p.images:
-                for img in p.images:
-                    post["images"].append(img.image_url)
-            posts.append(post)
-
-        return posts
+        return [post_with_relations_to_json(p) for p in search_posts]
 
     async def get_post_by_id(self, post_id: UUID, db: Session) -> Post:
         post_db = db.query(Post).filter(Post.id == post_id).first()
 
-        if not post_db:
+        if post_db:
+            return post_with_relations_to_json(post_db)
+
+        # only misses pay for the cold tier lookup
+        archived = db.execute(
+            select(
+                posts_archive.c.id,
+                posts_archive.c.user_id,
+                posts_archive.c.title,
+                posts_archive.c.content,
+                posts_archive.c.created_at,
+                posts_archive.c.updated_at,
+                posts_archive.c.like_count.label("likes"),
+                archived_image_urls(posts_archive.c.id).label("images"),
+            )
+            .join(User, User.id == posts_archive.c.user_id)
+            .where(posts_archive.c.id == post_id, User.deleted_at.is_(None))
+        ).first()
+
+        if not archived:
             raise PostNotFoundError()
 
-        post = post_to_json(post_db)
-        post["images"] = []
-        post["likes"] = len(post_db.likes)
+        return post_row_to_json(archived)
 
-        if post_db.images:
-            for img in post_db.images:
-                post["images"].append(img.image_url)
+    async def get_home_timeline(
+        self,
+        user_id: UUID,
+        limit: int,
+        db: Session,
+        before: UUID | None = None,
+    ) -> list[Post]:
+        # fanned-out entries plus, read-time, the latest posts of followed
+        # accounts too large to fan out; both branches are index range scans
+        fanned_out = (
+            select(TimelineEntry.post_id.label("id"))
+            .where(TimelineEntry.user_id == user_id)
+            .order_by(TimelineEntry.post_id.desc())
+            .limit(limit)
+        )
+        pulled = (
+            select(Post.id)
+            .join(Follow, Follow.followee_id == Post.user_id)
+            .join(User, User.id == Follow.followee_id)
+            .where(
+                Follow.follower_id == user_id,
+                User.follower_count >= settings.TIMELINE_FANOUT_MAX_FOLLOWERS,
+            )
+            .order_by(Post.id.desc())
+            .limit(limit)
+        )
+        if before:
+            fanned_out = fanned_out.where(TimelineEntry.post_id < before)
+            pulled = pulled.where(Post.id < before)
+
+        timeline_ids = union(fanned_out, pulled).subquery("timeline_ids")
+
+        timeline_posts = (
+            db.query(Post)
+            .options(selectinload(Post.images))
+            .join(timeline_ids, timeline_ids.c.id == Post.id)
+            .order_by(Post.id.desc())
+            .limit(limit)
+            .all()
+        )
 
-        return post
+        if not timeline_posts:
+            raise PostsNotFoundError()
 
-    async def get_like(self, post_id: UUID, user_id: UUID, db: Session):
-        like = (
-            db.query(Like)
-            .filter(and_(Like.post_id == post_id, Like.user_id == user_id))
-            .first()
+        return [post_with_relations_to_json(p) for p in timeline_posts]
+
+    async def get_liked_posts(
+        self,
+        user_id: UUID,
+        limit: int,
+        db: Session,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        # newest likes first, read backwards off (user_id, liked_at, post_id)
+        # with the like count and image urls of each post in the same statement
+        stmt = (
+            select(
+                *POST_COLUMNS,
+                Post.like_count.label("likes"),
+                post_image_urls(Post.id).label("images"),
+                Like.liked_at,
+            )
+            .join(Post, Post.id == Like.post_id)
+            .where(Like.user_id == user_id)
+            .order_by(Like.liked_at.desc(), Like.post_id.desc())
+            .limit(limit)
         )
+        if cursor:
+            liked_at, post_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(Like.liked_at, Like.post_id) < (liked_at, post_id))
 
-        return like
+        rows = db.execute(stmt).all()
 
-    async def create_post(self, post_create: PostCreateV1, db: Session) -> Post:
-        user = db.query(User.id).filter(User.username == post_create.username).scalar()
+        if not rows and not await user_service.user_exists(user_id, db):
+            raise UserNotFoundError()
 
-        if not user:
-            raise UserNotSignedUpError()
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1].liked_at, rows[-1].id)
+
+        return [post_row_to_json(row) for row in rows], next_cursor
+
+    async def get_posts_by_ids(self, post_ids: list[UUID], db: Session) -> list[dict]:
+        check_batch_size(post_ids)
+
+        stmt = select(
+            *POST_COLUMNS,
+            Post.like_count.label("likes"),
+            post_image_urls(Post.id).label("images"),
+        ).where(Post.id == any_(uuid_array(post_ids)))
+
+        posts = {row.id: post_row_to_json(row) for row in db.execute(stmt)}
+
+        return [
+            {
+                "id": str(post_id),
+                "status": "found" if post_id in posts else "not_found",
+                "post": posts.get(post_id),
+            }
+            for post_id in dict.fromkeys(post_ids)
+        ]
+
+    async def get_like(self, post_id: UUID, user_id: UUID, db: Session):
+        like = db.scalars(
+            LIKE_BY_KEY, {"post_id": post_id, "user_id": user_id}
+        ).first()
 
+        return like
+
+    async def create_post(self, post_create: PostCreateV1, db: Session) -> dict:
         post_db = PostInDBV1(**post_create.model_dump(), created_at=datetime.now())
+        image_urls = list(dict.fromkeys(post_create.image or []))
 
-        post = Post(
-            user_id=user,
-            title=post_db.title,
-            content=post_db.content,
-            created_at=post_db.created_at,
-        )
+        for _ in range(2):
+            user_id = await user_service.get_user_id_by_username(
+                post_db.username, db, recheck_misses=True
+            )
+            if not user_id:
+                raise UserNotSignedUpError()
+
+            fan_out = None
+            try:
+                post_row = db.execute(post_insert(post_db, user_id, image_urls)).first()
+                # accounts above the threshold are merged into timelines on read
+                if post_row and 0 < post_row.follower_count < settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+                    fan_out = job_runner.stage(
+                        db, fan_out_job, post_id=post_row.id, author_id=post_row.user_id
+                    )
+                db.commit()
+            except OperationalError:
+                # statement timeouts become a 503 in app/main.py
+                db.rollback()
+                raise
+            except Exception as e:
+                db.rollback()
+                raise ServerError() from e
+
+            if post_row:
+                break
+            # a stale cache entry; look the username up once more
+            await user_service.invalidate_user(user_id, post_db.username)
+        else:
+            raise UserNotSignedUpError()
 
-        if post_create.image:
-            for img in post_create.image:
-                image = Image(id=uuid4(), image_url=img)
-                if image not in post.images:
-                    post.images.append(image)
+        if fan_out:
+            await job_runner.submit(fan_out)
 
-        try:
-            db.add(post)
-            db.flush()
-            db.refresh(post)
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            raise ServerError() from e
+        post = post_row_to_json(post_row)
+        post.pop("follower_count")
+        post["images"] = image_urls
+        post["likes"] = 0
 
-        user_post = await self.get_post_by_id(post.id, db)
-        return user_post
+        event_broker.publish_post(post)
+        return post
 
     async def load_image(self, post_id: UUID, image_url: str, db: Session):
-        post_db = db.query(Post).filter(Post.id == post_id).first()
+        # one probe of the post_images primary key instead of loading the post
+        # and every image it has
+        stmt = select(
+            select(Post.id)
+            .where(Post.id == post_id, Post.deleted_at.is_(None))
+            .exists(),
+            select(post_image.c.image_id)
+            .join(Image, Image.id == post_image.c.image_id)
+            .where(post_image.c.post_id == post_id, Image.image_url == image_url)
+            .exists(),
+        )
+        post_exists, image_exists = db.execute(stmt).one()
+
+        if not post_exists:
+            # archived posts keep serving the images get_post_by_id lists
+            archived_stmt = select(
+                select(posts_archive.c.id)
+                .join(User, User.id == posts_archive.c.user_id)
+                .where(posts_archive.c.id == post_id, User.deleted_at.is_(None))
+                .exists(),
+                select(post_images_archive.c.image_id)
+                .join(Image, Image.id == post_images_archive.c.image_id)
+                .where(
+                    post_images_archive.c.post_id == post_id,
+                    Image.image_url == image_url,
+                )
+                .exists(),
+            )
+            post_exists, image_exists = db.execute(archived_stmt).one()
 
-        if not post_db:
+        if not post_exists:
             raise PostNotFoundError()
 
-        image_urls = [img.image_url for img in post_db.images]
-
-        if image_url not in image_urls:
+        if not image_exists:
             raise InvalidImageUrlError()
 
         path = generate_file_path(image_url)
@@ -200,33 +550,124 @@ class PostService:
     async def like_post(
         self, post_id: UUID, like_create: LikeCreate, db: Session
     ) -> Post:
-        like_db = await self.get_like(post_id, like_create.user_id, db)
+        # cached hits are trusted; the foreign key still catches a user
+        # deleted since then, and no row comes back for a missing post
+        if not await user_service.user_exists(like_create.user_id, db, recheck_misses=True):
+            raise UserNotFoundError()
+
+        try:
+            like_db = db.scalars(like_insert(post_id, like_create.user_id)).first()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if "user_id" in constraint_name(e):
+                raise UserNotFoundError() from e
+            if "post_id" in constraint_name(e):
+                raise PostsNotFoundError() from e
+            raise ServerError() from e
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
         if like_db:
-            return like_to_json(like_db)
+            event_broker.publish_like(post_id, 1)
+        else:
+            like_db = await self.get_like(post_id, like_create.user_id, db)
+            if like_db is None:
+                raise PostsNotFoundError()
 
-        user_db = await user_service.get_user_by_id(like_create.user_id, db)
-        post_db = db.query(Post).filter(Post.id == post_id).first()
+        like = like_to_json(like_db)
+        return like
 
-        if not user_db:
-            raise UserNotFoundError()
+    async def like_posts(self, like_batch: LikeBatchCreate, db: Session) -> list[dict]:
+        check_batch_size(like_batch.post_ids)
 
-        if not post_db:
-            raise PostsNotFoundError()
+        found = (
+            select(Post.id)
+            .where(Post.id == any_(uuid_array(like_batch.post_ids)), Post.deleted_at.is_(None))
+            .cte("found")
+        )
+        inserted = (
+            insert(Like)
+            .from_select(
+                ["post_id", "user_id", "liked_at"],
+                select(
+                    found.c.id,
+                    literal(like_batch.user_id, SA_UUID),
+                    literal(datetime.now()),
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=[Like.post_id, Like.user_id])
+            .returning(Like.post_id)
+            .cte("inserted")
+        )
+        stmt = select(found.c.id, inserted.c.post_id.is_not(None)).outerjoin(
+            inserted, inserted.c.post_id == found.c.id
+        )
 
-        like_db = Like(post_id=post_id, user_id=like_create.user_id)
+        try:
+            results = dict(db.execute(stmt).tuples().all())
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise UserNotFoundError() from e
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
+        statuses = []
+        for post_id in dict.fromkeys(like_batch.post_ids):
+            if post_id not in results:
+                status = "not_found"
+            elif results[post_id]:
+                status = "liked"
+            else:
+                status = "already_liked"
+            statuses.append({"post_id": str(post_id), "status": status})
+
+            if status == "liked":
+                event_broker.publish_like(post_id, 1)
+        return statuses
+
+    async def unlike_posts(self, like_batch: LikeBatchCreate, db: Session) -> list[dict]:
+        check_batch_size(like_batch.post_ids)
+
+        stmt = (
+            delete(Like)
+            .where(
+                Like.user_id == like_batch.user_id,
+                Like.post_id == any_(uuid_array(like_batch.post_ids)),
+            )
+            .returning(Like.post_id)
+            .execution_options(synchronize_session=False)
+        )
 
         try:
-            db.add(like_db)
-            db.flush()
-            db.refresh(like_db)
+            unliked = set(db.scalars(stmt).all())
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
-        like_db = await self.get_like(post_db.id, user_db.id, db)
-        like = like_to_json(like_db)
-        return like
+        for post_id in unliked:
+            event_broker.publish_like(post_id, -1)
+
+        return [
+            {
+                "post_id": str(post_id),
+                "status": "unliked" if post_id in unliked else "not_liked",
+            }
+            for post_id in dict.fromkeys(like_batch.post_ids)
+        ]
 
     async def upload_image(self, images: UploadFile):
         images = await write_file(images)
@@ -235,77 +676,95 @@ class PostService:
     async def update_post(
         self, post_id: UUID, post_update: PostUpdateV1, db: Session
     ) -> Post:
-        post_db = db.query(Post).filter(Post.id == post_id).first()
-
-        if not post_db:
-            raise PostsNotFoundError()
-
         post_update_dict = post_update.model_dump(exclude_unset=True)
 
-        for k, v in post_update_dict.items():
-            setattr(post_db, k, v)
+        if not post_update_dict:
+            return await self.get_post_by_id(post_id, db)
+
+        stmt = (
+            update(Post)
+            .where(Post.id == post_id, Post.deleted_at.is_(None))
+            .values(**post_update_dict)
+            .returning(
+                *POST_COLUMNS,
+                Post.like_count.label("likes"),
+                post_image_urls(Post.id).label("images"),
+            )
+            .execution_options(synchronize_session=False)
+        )
 
         try:
-            db.add(post_db)
-            db.flush()
-            db.refresh(post_db)
+            post_row = db.execute(stmt).first()
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
-        post_db = db.query(Post).filter(Post.id == post_id).first()
-
-        post = post_to_json(post_db)
-        post["images"] = []
-        post["likes"] = len(post_db.likes)
-
-        if post_db.images:
-            for img in post_db.images:
-                post["images"].append(img.image_url)
+        if not post_row:
+            raise PostsNotFoundError()
 
-        return post
+        return post_row_to_json(post_row)
 
     async def delete_like(self, post_id: UUID, user_id: UUID, db: Session):
-        user_db = await user_service.get_user_by_id(user_id, db)
-        post_db = db.query(Post).filter(Post.id == post_id).first()
-
-        if not user_db:
+        if not await user_service.user_exists(user_id, db, recheck_misses=True):
             raise UserNotFoundError()
 
-        if not post_db:
-            raise PostsNotFoundError()
-
-        like = await self.get_like(post_db.id, user_db.id, db)
+        stmt = (
+            delete(Like)
+            .where(Like.post_id == post_id, Like.user_id == user_id)
+            .returning(Like.post_id)
+            .execution_options(synchronize_session=False)
+        )
 
         try:
-            post_db.likes.remove(like)
+            deleted = db.execute(stmt).first()
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
+        if deleted:
+            event_broker.publish_like(post_id, -1)
+            return
+
+        if not db.scalar(select(Post.id).where(Post.id == post_id)):
+            raise PostsNotFoundError()
+
     async def delete_image(self, post_id: UUID, image_name: str, db: Session):
         post_db = db.query(Post).filter(Post.id == post_id).first()
 
         if not post_db:
             raise PostsNotFoundError()
 
-        for img in post_db.images:
-            if img.image_url == image_name:
-                delete_file(image_name)
-
-        image = db.query(Image).filter(Image.image_url == image_name).first()
+        image = next((img for img in post_db.images if img.image_url == image_name), None)
+        if image is None:
+            raise InvalidImageUrlError()
 
         try:
             post_db.images.remove(image)
+            # the file goes once the image link is committed away, and only
+            # if no other post links the same name
+            cleanup = job_runner.stage(db, delete_unreferenced_files, names=[image_name])
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
-            print(e)
             db.rollback()
             raise ServerError() from e
 
-    async def delete_post(self, post_id: UUID, db: Session):
+        await job_runner.submit(cleanup)
+
+    async def delete_post(self, post_id: UUID, db: Session, background: bool = False):
+        if background:
+            return await self.mark_post_deleted(post_id, db)
+
         post_db = db.query(Post).filter(Post.id == post_id).first()
 
         if not post_db:
@@ -314,9 +773,36 @@ class PostService:
         try:
             db.delete(post_db)
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
+    async def mark_post_deleted(self, post_id: UUID, db: Session):
+        # reads stop seeing the post now; app/tasks/deletion.py purges its
+        # likes, images and files in bounded batches later
+        stmt = (
+            update(Post)
+            .where(Post.id == post_id, Post.deleted_at.is_(None))
+            .values(deleted_at=datetime.now())
+            .returning(Post.id)
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            deleted = db.execute(stmt).first()
+            db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
+        if not deleted:
+            raise PostsNotFoundError()
+
 
 post_service = PostService()
@@ -0,0 +1,26 @@
+from sqlalchemy import asc, desc
+
+from app.models.users import User
+from app.models.posts import Post
+from app.core.exceptions import InvalidSortError
+
+# Every sort key maps to the leading columns of a (column, id) B-tree index,
+# with the primary key as tie-breaker so pages are deterministic and served
+# by an index scan in either direction.
+POST_SORTS = {
+    "created_at": (Post.created_at, Post.id),
+    "title": (Post.title, Post.id),
+    "like_count": (Post.like_count, Post.id),
+}
+
+USER_SORTS = {
+    "username": (User.username, User.id),
+}
+
+
+def sort_clauses(sorts: dict, sort: str, order: str | None = None) -> list:
+    if sort not in sorts or order not in (None, "asc", "desc"):
+        raise InvalidSortError()
+
+    direction = desc if order == "desc" else asc
+    return [direction(col) for col in sorts[sort]]
@@ -1,18 +1,51 @@
 from uuid import UUID
-from sqlalchemy import desc, func
+from datetime import datetime
 from sqlalchemy.orm import Session
-
-from app.models.users import User
-from app.utils import hash_password, post_to_json
-from app.schemas.users import UserCreateV1, UserUpdateV1
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy import func, update, select, delete, any_, literal, bindparam, UUID as SA_UUID
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models.users import User, Follow
+from app.models.posts import Post, TimelineEntry
+from app.database.ids import uuid7
+from app.core.tracing import trace_methods
+from app.core.cache import TwoLevelCache, MISSING, shared_tier
+from app.tasks.jobs import job, job_runner
+from app.services.sorting import USER_SORTS, sort_clauses
+from app.utils import (
+    hash_password,
+    follow_to_json,
+    user_to_json,
+    check_batch_size,
+    uuid_array,
+    run_cancellable,
+)
+from app.schemas.users import UserCreateV1, UserUpdateV1, FollowCreate
 from app.core.exceptions import (
     UserExistError,
     UserNotFoundError,
     UsersNotFoundError,
+    InvalidFollowError,
     ServerError,
 )
 
+# "id:<user id>" -> username and "username:<username>" -> user id, with
+# MISSING for users that do not exist
+user_cache = TwoLevelCache("user:", shared_tier(settings.USER_CACHE_SHARED_URL))
+
+
+@job("invalidate_user_cache")
+def invalidate_user_cache(keys: list[str]):
+    if not user_cache.delete(*keys):
+        raise ConnectionError("Shared user cache is unreachable")
+
+
+# built once and bound per call, see the hot statements in app/services/posts.py
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
 
+
+@trace_methods
 class UserService:
     async def get_users(
         self,
@@ -22,24 +55,14 @@ class UserService:
         order: str,
         sort: str | None = None,
     ) -> list[User]:
-        is_sort = False
+        query = db.query(User)
+
         if sort:
-            if order == "desc":
-                sort_cte = db.query(User).order_by(desc(sort)).cte("sort_cte")
-            else:
-                sort_cte = db.query(User).order_by(sort).cte("sort_cte")
-            is_sort = True
-
-        if is_sort:
-            users = (
-                db.query(User)
-                .join(sort_cte, User.id == sort_cte.c.id)
-                .offset(offset)
-                .limit(limit)
-                .all()
-            )
+            query = query.order_by(*sort_clauses(USER_SORTS, sort, order))
         else:
-            users = db.query(User).offset(offset).limit(limit).all()
+            query = query.order_by(User.id)
+
+        users = query.offset(offset).limit(limit).all()
 
         if not users:
             raise UsersNotFoundError()
@@ -48,20 +71,14 @@ class UserService:
     async def search_users(
         self, q: str, offset: int, limit: int, db: Session
     ) -> list[User]:
-        search_cte = (
+        query = (
             db.query(User)
             .filter(func.lower(User.username).op("%")(func.lower(q)))
-            .order_by(func.similarity(User.username, q).desc())
-            .cte("search_cte")
-        )
-
-        search_result = (
-            db.query(User)
-            .join(search_cte, User.id == search_cte.c.id)
+            .order_by(func.similarity(User.username, q).desc(), User.id)
             .offset(offset)
             .limit(limit)
-            .all()
         )
+        search_result = await run_cancellable(query.all)
 
         if not search_result:
             raise UsersNotFoundError()
@@ -75,100 +92,268 @@ class UserService:
         return user
 
     async def get_user_by_id(self, user_id: UUID, db: Session) -> User:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = db.scalars(USER_BY_ID, {"user_id": user_id}).first()
 
         if not user:
             raise UserNotFoundError()
         return user
 
-    async def get_user_likes(self, user_id: UUID, db: Session):
-        user = await self.get_user_by_id(user_id, db)
-
-        if not user:
-            raise UserNotFoundError()
-
-        user_likes = user.likes
-        posts = []
-
-        for like in user_likes:
-            posts.append(like.post)
-
-        user_liked_posts = []
-        for p in posts:
-            post = post_to_json(p)
-            post["images"] = []
-            post["likes"] = len(p.likes)
-
-            if p.images:
-                for img in p.images:
-                    post["images"].append(img.image_url)
-            user_liked_posts.append(post)
-
-        return user_liked_posts
-
-    async def create_user(self, user_create: UserCreateV1, db: Session) -> User:
-        user_by_email = (
-            db.query(User.email).filter(User.email == user_create.email).first()
+    async def get_user_id_by_username(
+        self, username: str, db: Session, recheck_misses: bool = False
+    ) -> UUID | None:
+        # other workers only drop a cached miss for a new user when it
+        # expires, so writes look misses up again
+        cached = user_cache.get(f"username:{username}")
+        if cached is not None and (cached != MISSING or not recheck_misses):
+            return UUID(cached) if cached else None
+
+        user_id = db.scalar(select(User.id).where(User.username == username).limit(1))
+        user_cache.set(f"username:{username}", str(user_id) if user_id else MISSING)
+        return user_id
+
+    async def user_exists(self, user_id: UUID, db: Session, recheck_misses: bool = False) -> bool:
+        cached = user_cache.get(f"id:{user_id}")
+        if cached is not None and (cached != MISSING or not recheck_misses):
+            return cached != MISSING
+
+        username = db.scalar(select(User.username).where(User.id == user_id))
+        user_cache.set(f"id:{user_id}", username or MISSING)
+        return username is not None
+
+    async def warm_user_cache(self, limit: int, db: Session) -> int:
+        '''Cache the lookups of the most recent posters, who are the likeliest to post again'''
+        recent_posters = (
+            select(Post.user_id).order_by(Post.id.desc()).limit(limit * 10).subquery()
         )
+        users = db.execute(
+            select(User.id, User.username)
+            .where(User.id.in_(select(recent_posters.c.user_id)))
+            .limit(limit)
+        ).all()
+
+        for user in users:
+            user_cache.set(f"username:{user.username}", str(user.id))
+            user_cache.set(f"id:{user.id}", user.username)
+        return len(users)
+
+    async def invalidate_user(self, user_id: UUID, *usernames: str):
+        keys = [f"id:{user_id}", *(f"username:{name}" for name in usernames)]
+        # a stale shared entry would otherwise be served until it expires
+        if not user_cache.delete(*keys):
+            await job_runner.enqueue(invalidate_user_cache, keys=keys)
+
+    async def get_users_by_ids(self, user_ids: list[UUID], db: Session) -> list[dict]:
+        check_batch_size(user_ids)
+
+        stmt = select(User).where(User.id == any_(uuid_array(user_ids)))
+        users = {user.id: user_to_json(user) for user in db.scalars(stmt)}
+
+        return [
+            {
+                "id": str(user_id),
+                "status": "found" if user_id in users else "not_found",
+                "user": users.get(user_id),
+            }
+            for user_id in dict.fromkeys(user_ids)
+        ]
 
-        if user_by_email:
-            raise UserExistError()
-
+    async def create_user(self, user_create: UserCreateV1, db: Session) -> User:
         user_create.password = hash_password(user_create.password)
 
-        user_db = User(**user_create.model_dump())
+        # the unique email index replaces the existence check
+        stmt = (
+            insert(User)
+            .values(id=uuid7(), **user_create.model_dump())
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User)
+        )
 
         try:
-            db.add(user_db)
-            db.flush()
-            db.refresh(user_db)
+            user = db.scalars(stmt).first()
             db.commit()
+        except OperationalError:
+            # statement timeouts become a 503 in app/main.py
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
-        user = await self.get_user_by_id(user_db.id, db)
+        if not user:
+            raise UserExistError()
+
+        # drop negative entries cached before the user signed up
+        await self.invalidate_user(user.id, user.username)
         return user
 
     async def update_user(
         self, user_id: UUID, user_update: UserUpdateV1, db: Session
     ) -> User:
-        user_db = await self.get_user_by_id(user_id, db)
-        if not user_db:
-            raise UserNotFoundError()
+        user_update_dict = user_update.model_dump(exclude_unset=True)
 
-        if user_update.email:
-            user_by_email = (
-                db.query(User.email).filter(User.email == user_update.email).first()
-            )
-            if user_by_email:
-                raise UserExistError()
+        if not user_update_dict:
+            return await self.get_user_by_id(user_id, db)
 
-        user_update_dict = user_update.model_dump(exclude_unset=True)
+        old_username = None
+        if "username" in user_update_dict:
+            old_username = db.scalar(select(User.username).where(User.id == user_id))
 
-        for k, v in user_update_dict.items():
-            setattr(user_db, k, v)
+        stmt = (
+            update(User)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+            .values(**user_update_dict)
+            .returning(User)
+            .execution_options(synchronize_session=False)
+        )
 
         try:
-            db.add(user_db)
-            db.flush()
-            db.refresh(user_db)
+            user = db.scalars(stmt).first()
             db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise UserExistError() from e
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
 
-        user = await self.get_user_by_id(user_id, db)
+        if not user:
+            raise UserNotFoundError()
+
+        await self.invalidate_user(user_id, *filter(None, [old_username, user.username]))
         return user
 
-    async def delete_user(self, user_id: UUID, db: Session):
+    async def delete_user(self, user_id: UUID, db: Session, background: bool = False):
+        if background:
+            return await self.mark_user_deleted(user_id, db)
+
         user_db = await self.get_user_by_id(user_id, db)
         if not user_db:
             raise UserNotFoundError()
 
+        username = user_db.username
         try:
             db.delete(user_db)
             db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
+        await self.invalidate_user(user_id, username)
+
+    async def mark_user_deleted(self, user_id: UUID, db: Session):
+        # reads stop seeing the user and their posts now; the loader
+        # criteria only filter the selected entity, so the posts are marked
+        # too. app/tasks/deletion.py purges posts, likes and follows in
+        # bounded batches later
+        now = datetime.now()
+        stmt = (
+            update(User)
+            .where(User.id == user_id, User.deleted_at.is_(None))
+            .values(deleted_at=now)
+            .returning(User.username)
+            .execution_options(synchronize_session=False)
+        )
+        hide_posts = (
+            update(Post)
+            .where(Post.user_id == user_id, Post.deleted_at.is_(None))
+            .values(deleted_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            deleted = db.execute(stmt).first()
+            if deleted:
+                db.execute(hide_posts)
+            db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
+        if not deleted:
+            raise UserNotFoundError()
+
+        await self.invalidate_user(user_id, deleted.username)
+
+    async def follow_user(self, user_id: UUID, follow_create: FollowCreate, db: Session):
+        if user_id == follow_create.follower_id:
+            raise InvalidFollowError()
+
+        stmt = (
+            insert(Follow)
+            .values(
+                follower_id=follow_create.follower_id,
+                followee_id=user_id,
+                followed_at=datetime.now(),
+            )
+            .on_conflict_do_nothing(index_elements=[Follow.follower_id, Follow.followee_id])
+            .returning(Follow)
+        )
+
+        # seed the new follower's timeline with the followee's latest posts
+        backfill = (
+            insert(TimelineEntry)
+            .from_select(
+                ["user_id", "post_id"],
+                select(literal(follow_create.follower_id, SA_UUID), Post.id)
+                .where(Post.user_id == user_id)
+                .order_by(Post.id.desc())
+                .limit(settings.TIMELINE_BACKFILL_POSTS),
+            )
+            .on_conflict_do_nothing()
+        )
+
+        try:
+            follow = db.scalars(stmt).first()
+            if follow:
+                db.execute(backfill)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            raise UserNotFoundError() from e
+        except OperationalError:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise ServerError() from e
+
+        if not follow:
+            follow = db.get(Follow, (follow_create.follower_id, user_id))
+        return follow_to_json(follow)
+
+    async def unfollow_user(self, user_id: UUID, follower_id: UUID, db: Session):
+        stmt = (
+            delete(Follow)
+            .where(Follow.follower_id == follower_id, Follow.followee_id == user_id)
+            .returning(Follow.followee_id)
+            .execution_options(synchronize_session=False)
+        )
+        timeline_entries = (
+            delete(TimelineEntry)
+            .where(
+                TimelineEntry.user_id == follower_id,
+                TimelineEntry.post_id.in_(select(Post.id).where(Post.user_id == user_id)),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        try:
+            unfollowed = db.execute(stmt).first()
+            if unfollowed:
+                db.execute(timeline_entries)
+            db.commit()
+        except OperationalError:
+            db.rollback()
+            raise
         except Exception as e:
             db.rollback()
             raise ServerError() from e
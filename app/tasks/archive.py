@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, any_, text
+
+from app.utils import uuid_array
+from app.core.config import settings
+from app.database.session import db_engine
+from app.models.posts import (
+    Post,
+    Like,
+    post_image,
+    posts_archive,
+    likes_archive,
+    post_images_archive,
+)
+
+logger = logging.getLogger(__name__)
+
+# arbitrary key shared by every worker so only one of them archives at a time
+ARCHIVE_LOCK_KEY = 320_047
+
+ARCHIVED_POST_COLUMNS = [
+    "id",
+    "user_id",
+    "title",
+    "content",
+    "created_at",
+    "updated_at",
+    "like_count",
+]
+
+
+def archive_batch(cutoff: datetime) -> int:
+    '''Move one batch of posts older than cutoff, with their likes and image links, in one transaction'''
+    with db_engine.begin() as conn:
+        # created_at, id walks ix_posts_created_at_id; posts being edited or
+        # liked right now are left for the next batch
+        post_ids = conn.execute(
+            select(Post.id)
+            .where(Post.created_at < cutoff, Post.deleted_at.is_(None))
+            .order_by(Post.created_at, Post.id)
+            .limit(settings.ARCHIVE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not post_ids:
+            return 0
+
+        ids = uuid_array(post_ids)
+        conn.execute(
+            insert(posts_archive).from_select(
+                ARCHIVED_POST_COLUMNS,
+                select(*(Post.__table__.c[name] for name in ARCHIVED_POST_COLUMNS)).where(
+                    Post.id == any_(ids)
+                ),
+            )
+        )
+        conn.execute(
+            insert(likes_archive).from_select(
+                ["post_id", "user_id", "liked_at"],
+                select(Like.post_id, Like.user_id, Like.liked_at).where(Like.post_id == any_(ids)),
+            )
+        )
+        conn.execute(
+            insert(post_images_archive).from_select(
+                ["post_id", "image_id"],
+                select(post_image.c.post_id, post_image.c.image_id).where(
+                    post_image.c.post_id == any_(ids)
+                ),
+            )
+        )
+        # likes, image links and timeline entries go with the post by cascade
+        conn.execute(delete(Post).where(Post.id == any_(ids)))
+    return len(post_ids)
+
+
+def archive_old_posts() -> int:
+    with db_engine.connect() as lock_conn:
+        locked = lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_KEY}
+        ).scalar()
+        lock_conn.commit()
+        if not locked:
+            return 0
+
+        try:
+            cutoff = datetime.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+            archived = 0
+            while True:
+                count = archive_batch(cutoff)
+                archived += count
+                if count < settings.ARCHIVE_BATCH_SIZE:
+                    break
+            if archived:
+                logger.info("Archived %d posts older than %s", archived, cutoff)
+            return archived
+        finally:
+            lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_KEY}
+            )
+            lock_conn.commit()
+
+
+async def run_archiver():
+    while True:
+        try:
+            await asyncio.to_thread(archive_old_posts)
+        except Exception:
+            logger.exception("Archiving old posts failed")
+        await asyncio.sleep(settings.ARCHIVE_POLL_SECONDS)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from uuid import UUID
+from sqlalchemy import select, delete, update, tuple_, or_, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.database.session import db_engine
+from app.models.users import User, Follow
+from app.models.posts import (
+    Post,
+    Image,
+    Like,
+    TimelineEntry,
+    post_image,
+    posts_archive,
+    likes_archive,
+    post_images_archive,
+)
+from app.tasks.image_gc import delete_unreferenced_files
+
+logger = logging.getLogger(__name__)
+
+# arbitrary key shared by every worker so only one of them purges at a time
+DELETION_LOCK_KEY = 320_037
+
+
+def delete_in_batches(table, key_columns: tuple, condition) -> int:
+    '''Delete matching rows DELETION_BATCH_SIZE at a time, one transaction per batch'''
+    deleted = 0
+    batch = select(*key_columns).where(condition).limit(settings.DELETION_BATCH_SIZE)
+    stmt = delete(table).where(tuple_(*key_columns).in_(batch))
+
+    while True:
+        with db_engine.begin() as conn:
+            count = conn.execute(stmt).rowcount
+        deleted += count
+        if count < settings.DELETION_BATCH_SIZE:
+            return deleted
+
+
+def purge_post(post_id: UUID):
+    delete_in_batches(Like, (Like.post_id, Like.user_id), Like.post_id == post_id)
+    delete_in_batches(
+        TimelineEntry,
+        (TimelineEntry.user_id, TimelineEntry.post_id),
+        TimelineEntry.post_id == post_id,
+    )
+
+    with db_engine.begin() as conn:
+        names = conn.execute(
+            delete(post_image)
+            .where(
+                post_image.c.post_id == post_id,
+                post_image.c.image_id == Image.id,
+            )
+            .returning(Image.image_url)
+        ).scalars().all()
+        conn.execute(delete(Post).where(Post.id == post_id))
+
+    # other posts may link the same file names, so only unreferenced files
+    # go; the unlinked image rows are left to the image GC
+    if names:
+        delete_unreferenced_files(names)
+
+
+def purge_archived_post(post_id: UUID):
+    delete_in_batches(
+        likes_archive,
+        (likes_archive.c.post_id, likes_archive.c.user_id),
+        likes_archive.c.post_id == post_id,
+    )
+
+    with db_engine.begin() as conn:
+        names = conn.execute(
+            delete(post_images_archive)
+            .where(
+                post_images_archive.c.post_id == post_id,
+                post_images_archive.c.image_id == Image.id,
+            )
+            .returning(Image.image_url)
+        ).scalars().all()
+        conn.execute(delete(posts_archive).where(posts_archive.c.id == post_id))
+
+    if names:
+        delete_unreferenced_files(names)
+
+
+def purge_user(user_id: UUID):
+    while True:
+        with db_engine.begin() as conn:
+            post_ids = conn.execute(
+                update(Post)
+                .where(
+                    Post.id.in_(
+                        select(Post.id)
+                        .where(Post.user_id == user_id)
+                        .limit(settings.DELETION_BATCH_SIZE)
+                    )
+                )
+                .values(deleted_at=text("coalesce(deleted_at, localtimestamp)"))
+                .returning(Post.id)
+            ).scalars().all()
+
+        for post_id in post_ids:
+            purge_post(post_id)
+        if len(post_ids) < settings.DELETION_BATCH_SIZE:
+            break
+
+    # archived posts are purged here rather than left to the users cascade,
+    # which would delete them and their likes in one unbounded statement
+    while True:
+        with db_engine.connect() as conn:
+            post_ids = conn.execute(
+                select(posts_archive.c.id)
+                .where(posts_archive.c.user_id == user_id)
+                .limit(settings.DELETION_BATCH_SIZE)
+            ).scalars().all()
+
+        for post_id in post_ids:
+            purge_archived_post(post_id)
+        if len(post_ids) < settings.DELETION_BATCH_SIZE:
+            break
+
+    delete_in_batches(Like, (Like.post_id, Like.user_id), Like.user_id == user_id)
+    delete_in_batches(
+        likes_archive,
+        (likes_archive.c.post_id, likes_archive.c.user_id),
+        likes_archive.c.user_id == user_id,
+    )
+    delete_in_batches(
+        Follow,
+        (Follow.follower_id, Follow.followee_id),
+        or_(Follow.follower_id == user_id, Follow.followee_id == user_id),
+    )
+    delete_in_batches(
+        TimelineEntry,
+        (TimelineEntry.user_id, TimelineEntry.post_id),
+        TimelineEntry.user_id == user_id,
+    )
+
+    with db_engine.begin() as conn:
+        conn.execute(delete(User).where(User.id == user_id))
+
+
+def purge_deleted(conn: Connection) -> int:
+    user_ids = conn.execute(
+        select(User.id).where(User.deleted_at.is_not(None)).limit(10)
+    ).scalars().all()
+    post_ids = conn.execute(
+        select(Post.id).where(Post.deleted_at.is_not(None)).limit(100)
+    ).scalars().all()
+    conn.rollback()
+
+    for user_id in user_ids:
+        purge_user(user_id)
+    for post_id in post_ids:
+        purge_post(post_id)
+    return len(user_ids) + len(post_ids)
+
+
+def run_purge() -> int:
+    with db_engine.connect() as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": DELETION_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            return 0
+        try:
+            return purge_deleted(conn)
+        finally:
+            conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": DELETION_LOCK_KEY}
+            )
+            conn.commit()
+
+
+async def run_deletion_worker():
+    while True:
+        try:
+            purged = await asyncio.to_thread(run_purge)
+        except Exception:
+            logger.exception("Purging soft-deleted rows failed")
+            purged = 0
+        if not purged:
+            await asyncio.sleep(settings.DELETION_POLL_SECONDS)
@@ -0,0 +1,192 @@
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterator
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import select, delete, exists, func, any_, bindparam, text, String, union_all
+
+from app.utils import delete_file
+from app.core.config import settings
+from app.database.session import db_engine
+from app.tasks.jobs import job
+from app.models.posts import Image, post_image, post_images_archive
+
+logger = logging.getLogger(__name__)
+
+# arbitrary key shared by every worker so only one of them collects at a time
+IMAGE_GC_LOCK_KEY = 320_038
+
+# package markers that live next to the uploads
+IGNORED_FILES = {"__init__.py"}
+
+names = bindparam("names", type_=ARRAY(String))
+
+# image links of hot and archived posts alike
+image_links = union_all(
+    select(post_image.c.image_id),
+    select(post_images_archive.c.image_id),
+).subquery()
+
+# names from the scanned batch that no post references any more; the index
+# on images.image_url keeps the right hand side to the batch's own rows
+UNREFERENCED_NAMES = select(func.unnest(names).column_valued("name")).except_(
+    select(Image.image_url)
+    .join(image_links, image_links.c.image_id == Image.id)
+    .where(Image.image_url == any_(names))
+)
+
+# image rows left behind by delete_image, which only removes the association
+UNLINKED_IMAGES = delete(Image).where(
+    Image.id.in_(
+        select(Image.id)
+        .where(
+            ~exists().where(post_image.c.image_id == Image.id),
+            ~exists().where(post_images_archive.c.image_id == Image.id),
+        )
+        .limit(bindparam("batch_size"))
+    )
+)
+
+
+class GCReport:
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.finished_at = None
+        self.scanned = 0
+        self.skipped_recent = 0
+        self.deleted_files = 0
+        self.reclaimed_bytes = 0
+        self.deleted_rows = 0
+
+    def to_json(self) -> dict:
+        return {
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "scanned": self.scanned,
+            "skipped_recent": self.skipped_recent,
+            "deleted_files": self.deleted_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "deleted_rows": self.deleted_rows,
+        }
+
+
+last_report: GCReport | None = None
+
+
+def scan_batches(directory: str) -> Iterator[list[os.DirEntry]]:
+    '''Walk the upload directory IMAGE_GC_BATCH_SIZE entries at a time'''
+    batch = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name in IGNORED_FILES or entry.name.startswith("."):
+                continue
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            batch.append(entry)
+            if len(batch) == settings.IMAGE_GC_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def collect_batch(entries: list[os.DirEntry], report: GCReport):
+    report.scanned += len(entries)
+
+    # anything younger than the grace period may belong to a post that is
+    # being created right now
+    cutoff = time.time() - settings.IMAGE_GC_GRACE_SECONDS
+    candidates = {}
+    for entry in entries:
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            report.skipped_recent += 1
+        else:
+            candidates[entry.name] = (entry.path, stat.st_size)
+
+    if not candidates:
+        return
+
+    with db_engine.connect() as conn:
+        orphans = conn.execute(UNREFERENCED_NAMES, {"names": list(candidates)}).scalars().all()
+
+    for name in orphans:
+        path, size = candidates[name]
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            continue
+        report.deleted_files += 1
+        report.reclaimed_bytes += size
+
+
+@job("delete_files")
+def delete_unreferenced_files(names: list[str]):
+    '''Delete upload files once no hot or archived post links them'''
+    with db_engine.connect() as conn:
+        orphans = conn.execute(UNREFERENCED_NAMES, {"names": names}).scalars().all()
+
+    for name in orphans:
+        delete_file(name)
+
+
+def delete_unlinked_images(report: GCReport):
+    while True:
+        with db_engine.begin() as conn:
+            count = conn.execute(
+                UNLINKED_IMAGES, {"batch_size": settings.IMAGE_GC_BATCH_SIZE}
+            ).rowcount
+        report.deleted_rows += count
+        if count < settings.IMAGE_GC_BATCH_SIZE:
+            return
+
+
+def collect_orphaned_images() -> GCReport | None:
+    '''Delete unreferenced image rows and upload files older than the grace period'''
+    global last_report
+
+    with db_engine.connect() as lock_conn:
+        locked = lock_conn.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": IMAGE_GC_LOCK_KEY}
+        ).scalar()
+        lock_conn.commit()
+        if not locked:
+            return None
+
+        try:
+            report = GCReport()
+            delete_unlinked_images(report)
+
+            # the I/O budget: a batch of N files may take no less than
+            # N / IMAGE_GC_FILES_PER_SECOND seconds
+            for batch in scan_batches(settings.IMAGE_UPLOAD_DIR):
+                started = time.monotonic()
+                collect_batch(batch, report)
+                budget = len(batch) / settings.IMAGE_GC_FILES_PER_SECOND
+                time.sleep(max(0.0, budget - (time.monotonic() - started)))
+
+            report.finished_at = datetime.now()
+            last_report = report
+            logger.info(
+                "Image GC deleted %d files (%d bytes) and %d rows",
+                report.deleted_files,
+                report.reclaimed_bytes,
+                report.deleted_rows,
+            )
+            return report
+        finally:
+            lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:key)"), {"key": IMAGE_GC_LOCK_KEY}
+            )
+            lock_conn.commit()
+
+
+async def run_image_gc():
+    while True:
+        try:
+            await asyncio.to_thread(collect_orphaned_images)
+        except Exception:
+            logger.exception("Collecting orphaned images failed")
+        await asyncio.sleep(settings.IMAGE_GC_INTERVAL_SECONDS)
@@ -0,0 +1,256 @@
+import random
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.session import db_engine
+from app.models.jobs import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobType:
+    '''A named handler with its own queue and worker count'''
+
+    def __init__(self, name: str, handler: Callable):
+        self.name = name
+        self.handler = handler
+        self.queue: asyncio.Queue = asyncio.Queue()
+        # set on enqueue so idle Postgres workers look before the next poll
+        self.wake = asyncio.Event()
+        self.running = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def concurrency(self) -> int:
+        return settings.JOBS_CONCURRENCY.get(self.name, 1)
+
+
+JOB_TYPES: dict[str, JobType] = {}
+
+
+def job(name: str):
+    '''Register a synchronous handler; it runs on a worker thread with the payload as keyword arguments'''
+    def register(handler: Callable) -> Callable:
+        handler.job_type = JOB_TYPES[name] = JobType(name, handler)
+        return handler
+    return register
+
+
+class QueuedJob:
+    def __init__(self, job_type: JobType, payload: dict, attempts: int = 0, id=None):
+        self.job_type = job_type
+        self.payload = payload
+        self.attempts = attempts
+        self.id = id
+
+
+def backoff(attempts: int) -> float:
+    delay = settings.JOBS_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    # jitter keeps retries of a batch of failed jobs from landing together
+    return min(delay, settings.JOBS_MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+
+class MemoryBackend:
+    '''Per-process queues; jobs still queued are lost when the worker stops'''
+
+    async def push(self, job: QueuedJob):
+        job.job_type.queue.put_nowait(job)
+
+    async def claim(self, job_type: JobType) -> QueuedJob:
+        job = await job_type.queue.get()
+        job.attempts += 1
+        return job
+
+    async def complete(self, job: QueuedJob):
+        pass
+
+    async def retry(self, job: QueuedJob, delay: float, error: str):
+        asyncio.get_running_loop().call_later(delay, job.job_type.queue.put_nowait, job)
+
+    async def fail(self, job: QueuedJob, error: str):
+        pass
+
+
+class PostgresBackend:
+    '''Jobs table shared by every worker, claimed with FOR UPDATE SKIP LOCKED'''
+
+    async def push(self, job: QueuedJob):
+        await asyncio.to_thread(self.insert, job)
+        job.job_type.wake.set()
+
+    def insert(self, job: QueuedJob):
+        with db_engine.begin() as conn:
+            conn.execute(insert(Job).values(job_type=job.job_type.name, payload=job.payload))
+
+    async def claim(self, job_type: JobType) -> QueuedJob:
+        while True:
+            job_type.wake.clear()
+            row = await asyncio.to_thread(self.claim_row, job_type.name)
+            if row is not None:
+                return QueuedJob(job_type, row.payload, row.attempts, row.id)
+            try:
+                await asyncio.wait_for(job_type.wake.wait(), timeout=settings.JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def claim_row(self, name: str):
+        now = datetime.now()
+        due = (
+            select(Job.id)
+            .where(Job.job_type == name, Job.run_at <= now, Job.failed_at.is_(None))
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        with db_engine.begin() as conn:
+            return conn.execute(
+                update(Job)
+                .where(Job.id.in_(due))
+                .values(
+                    attempts=Job.attempts + 1,
+                    run_at=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+                )
+                .returning(Job.id, Job.payload, Job.attempts)
+            ).first()
+
+    async def complete(self, job: QueuedJob):
+        await asyncio.to_thread(self.execute, delete(Job).where(Job.id == job.id))
+
+    async def retry(self, job: QueuedJob, delay: float, error: str):
+        await asyncio.to_thread(
+            self.execute,
+            update(Job)
+            .where(Job.id == job.id)
+            .values(run_at=datetime.now() + timedelta(seconds=delay), last_error=error),
+        )
+
+    async def fail(self, job: QueuedJob, error: str):
+        # kept for inspection rather than deleted
+        await asyncio.to_thread(
+            self.execute,
+            update(Job).where(Job.id == job.id).values(failed_at=datetime.now(), last_error=error),
+        )
+
+    def execute(self, stmt):
+        with db_engine.begin() as conn:
+            conn.execute(stmt)
+
+
+BACKENDS = {"memory": MemoryBackend, "postgres": PostgresBackend}
+
+
+class JobRunner:
+    '''Worker pool running deferred work, JOBS_CONCURRENCY workers per job type'''
+
+    def __init__(self):
+        self.backend = BACKENDS[settings.JOBS_BACKEND]()
+        self.started = False
+
+    async def enqueue(self, handler: Callable, **payload):
+        '''Queue a job for work that is already committed'''
+        await self.submit(QueuedJob(handler.job_type, jsonable_encoder(payload)))
+
+    def stage(self, db: Session, handler: Callable, **payload) -> QueuedJob:
+        '''Add a job to the caller's transaction; submit it once that commits'''
+        job = QueuedJob(handler.job_type, jsonable_encoder(payload))
+        # the Postgres row commits or rolls back with the caller's own
+        # writes, so a crash right after the commit cannot lose the job
+        if isinstance(self.backend, PostgresBackend):
+            job.id = db.scalar(
+                insert(Job)
+                .values(job_type=job.job_type.name, payload=job.payload)
+                .returning(Job.id)
+            )
+        return job
+
+    async def submit(self, job: QueuedJob):
+        # the caller's write is committed by now, so a job that cannot be
+        # handed over is logged instead of failing the request
+        try:
+            if job.id is not None:
+                job.job_type.wake.set()
+            # scripts and benchmarks call the services without the runner;
+            # in-process jobs then run before the call returns
+            elif not self.started and isinstance(self.backend, MemoryBackend):
+                await asyncio.to_thread(job.job_type.handler, **job.payload)
+            else:
+                await self.backend.push(job)
+        except Exception:
+            logger.exception("Running or queueing a %s job failed", job.job_type.name)
+
+    def start(self) -> list[asyncio.Task]:
+        self.started = True
+        return [
+            asyncio.create_task(self.work(job_type))
+            for job_type in JOB_TYPES.values()
+            for _ in range(job_type.concurrency)
+        ]
+
+    async def work(self, job_type: JobType):
+        while True:
+            try:
+                job = await self.backend.claim(job_type)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Claiming a %s job failed", job_type.name)
+                await asyncio.sleep(settings.JOBS_POLL_SECONDS)
+                continue
+
+            job_type.running += 1
+            try:
+                await self.run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # the backend itself failed; a Postgres job comes back once its lease runs out
+                logger.exception("Recording the outcome of a %s job failed", job_type.name)
+            finally:
+                job_type.running -= 1
+
+    async def run(self, job: QueuedJob):
+        job_type = job.job_type
+        try:
+            await asyncio.to_thread(job_type.handler, **job.payload)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+                job_type.failed += 1
+                logger.exception("%s job failed after %d attempts", job_type.name, job.attempts)
+                return await self.backend.fail(job, error)
+
+            job_type.retried += 1
+            logger.warning("%s job failed (attempt %d), retrying: %s", job_type.name, job.attempts, error)
+            return await self.backend.retry(job, backoff(job.attempts), error)
+
+        job_type.succeeded += 1
+        await self.backend.complete(job)
+
+
+job_runner = JobRunner()
+
+
+def job_stats() -> dict:
+    return {
+        "backend": settings.JOBS_BACKEND,
+        "job_types": {
+            job_type.name: {
+                "concurrency": job_type.concurrency,
+                # Postgres-backed jobs wait in the jobs table instead
+                "queued": job_type.queue.qsize(),
+                "running": job_type.running,
+                "succeeded": job_type.succeeded,
+                "retried": job_type.retried,
+                "failed": job_type.failed,
+            }
+            for job_type in JOB_TYPES.values()
+        },
+    }
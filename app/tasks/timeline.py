@@ -0,0 +1,50 @@
+from uuid import UUID
+from sqlalchemy import select, literal, UUID as SA_UUID
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.models.users import Follow
+from app.models.posts import TimelineEntry
+from app.database.session import db_engine
+from app.tasks.jobs import job
+
+
+def fan_out_post(post_id: UUID, author_id: UUID) -> int:
+    '''Insert the post into every follower's home timeline, one batch per transaction'''
+    delivered = 0
+    last_follower_id = None
+
+    while True:
+        followers = (
+            select(Follow.follower_id)
+            .where(Follow.followee_id == author_id)
+            .order_by(Follow.follower_id)
+            .limit(settings.TIMELINE_FANOUT_BATCH_SIZE)
+        )
+        if last_follower_id:
+            followers = followers.where(Follow.follower_id > last_follower_id)
+        batch = followers.cte("batch")
+
+        entries = (
+            insert(TimelineEntry)
+            .from_select(
+                ["user_id", "post_id"],
+                select(batch.c.follower_id, literal(post_id, SA_UUID)),
+            )
+            .on_conflict_do_nothing()
+        )
+        stmt = select(batch.c.follower_id).add_cte(entries.cte("entries"))
+
+        with db_engine.begin() as conn:
+            follower_ids = conn.execute(stmt).scalars().all()
+
+        delivered += len(follower_ids)
+        if len(follower_ids) < settings.TIMELINE_FANOUT_BATCH_SIZE:
+            return delivered
+        last_follower_id = max(follower_ids)
+
+
+@job("fan_out")
+def fan_out_job(post_id: str, author_id: str):
+    # entries are inserted with ON CONFLICT DO NOTHING, so a retry is safe
+    fan_out_post(UUID(post_id), UUID(author_id))
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.database.session import db_engine
+
+logger = logging.getLogger(__name__)
+
+# arbitrary key shared by every worker so only one of them refreshes at a time
+TRENDING_LOCK_KEY = 320_032
+
+
+def refresh_trending_posts() -> bool:
+    with db_engine.begin() as conn:
+        locked = conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": TRENDING_LOCK_KEY}
+        ).scalar()
+        if not locked:
+            return False
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY trending_posts"))
+    return True
+
+
+async def run_trending_refresher():
+    while True:
+        try:
+            await asyncio.to_thread(refresh_trending_posts)
+        except Exception:
+            logger.exception("Refreshing trending_posts failed")
+        await asyncio.sleep(settings.TRENDING_REFRESH_SECONDS)
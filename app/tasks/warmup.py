@@ -0,0 +1,83 @@
+import time
+import asyncio
+import logging
+from sqlalchemy import select, text
+from sqlalchemy.orm import configure_mappers
+
+from app.core.config import settings
+from app.core.exceptions import AppException
+from app.database.ids import uuid7
+from app.database.session import SessionLocal, db_engine
+from app.models.posts import Like
+from app.services.posts import post_service, like_insert
+from app.services.users import user_service
+
+logger = logging.getLogger(__name__)
+
+
+def fill_pool(count: int) -> int:
+    '''Open and ping count connections at once so the pool keeps them all'''
+    # connections past pool_size are overflow and closed on release
+    count = min(count, db_engine.pool.size())
+    connections = []
+    try:
+        for _ in range(count):
+            conn = db_engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+            conn.rollback()
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+async def warm_statements():
+    '''Run the hot read paths once so their statements sit in the compiled cache'''
+    db = SessionLocal()
+    try:
+        post_id = None
+        try:
+            posts = await post_service.get_posts(0, 1, db)
+            post_id = posts[0]["id"]
+        except AppException:
+            pass
+
+        # a hit also compiles the images lazy load, a miss the archive fallback
+        for lookup_id in filter(None, (post_id, uuid7())):
+            try:
+                await post_service.get_post_by_id(lookup_id, db)
+            except AppException:
+                pass
+
+        # re-inserting an existing like is a no-op through ON CONFLICT, and
+        # rolled back regardless
+        like = db.execute(select(Like.post_id, Like.user_id).limit(1)).first()
+        if like:
+            db.execute(like_insert(like.post_id, like.user_id))
+        db.rollback()
+
+        return await user_service.warm_user_cache(settings.WARMUP_CACHED_USERS, db)
+    finally:
+        db.close()
+
+
+async def warm_up():
+    '''Pay the first-request costs before the worker starts taking traffic'''
+    started = time.perf_counter()
+    try:
+        configure_mappers()
+        connections = await asyncio.to_thread(fill_pool, settings.WARMUP_CONNECTIONS)
+        # nothing is served yet, so the blocking queries can run on the loop
+        cached_users = await warm_statements()
+    except Exception:
+        # a cold worker is still a working one
+        logger.exception("Warm-up failed")
+        return
+
+    logger.info(
+        "Warm-up took %.0f ms: %d pooled connections, %d cached users",
+        (time.perf_counter() - started) * 1000,
+        connections,
+        cached_users,
+    )
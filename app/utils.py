@@ -1,10 +1,27 @@
 import aiofiles
+from uuid import UUID
+from datetime import datetime
+from base64 import urlsafe_b64encode, urlsafe_b64decode
 from pathlib import Path
-from fastapi import UploadFile
+from typing import Callable
+from fastapi import UploadFile, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, UUID as SA_UUID
+from sqlalchemy.dialects.postgresql import ARRAY
 from passlib.context import CryptContext
 from fastapi.encoders import jsonable_encoder
 
-from app.models.users import User
+from app.models.users import User, Follow
+from app.core.tracing import traced
+from app.core.config import settings
+from app.core.admission import route_group
+from app.core.cancellation import on_disconnect, cancel_query
+from app.core.exceptions import (
+    BatchSizeError,
+    AdminAuthError,
+    InvalidCursorError,
+    InvalidFileNameError,
+)
 from app.models.posts import Post, Like
 from app.database.session import SessionLocal
 
@@ -19,14 +36,50 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_db():
+async def get_db(request: Request):
     db = SessionLocal()
+    group = route_group(request.method, request.scope["path"])
+    db.info["statement_timeout_ms"] = settings.STATEMENT_TIMEOUTS_MS.get(group)
+    on_disconnect(request, lambda: cancel_query(db))
     try:
         yield db
     finally:
         db.close()
 
 
+async def run_cancellable(query: Callable):
+    '''Run a blocking query off the event loop, where a client disconnect can cancel it'''
+    # a cancelled query surfaces as OperationalError, answered with a 503 in app/main.py
+    return await run_in_threadpool(query)
+
+
+def check_batch_size(items: list):
+    if not items or len(items) > settings.MAX_BATCH_SIZE:
+        raise BatchSizeError()
+
+
+def uuid_array(ids: list[UUID]):
+    return bindparam("ids", value=list(ids), type_=ARRAY(SA_UUID))
+
+
+def require_admin(x_admin_key: str | None = Header(default=None)):
+    # admin endpoints stay closed until a key is configured
+    if not settings.ADMIN_API_KEY or x_admin_key != settings.ADMIN_API_KEY:
+        raise AdminAuthError()
+
+
+def encode_cursor(liked_at: datetime, post_id: UUID) -> str:
+    return urlsafe_b64encode(f"{liked_at.isoformat()}|{post_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        liked_at, post_id = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(liked_at), UUID(post_id)
+    except ValueError as e:
+        raise InvalidCursorError() from e
+
+
 def users_to_json(users: list[User]):
     return [jsonable_encoder(u, exclude={"password", "username_search"}) for u in users]
 
@@ -36,19 +89,47 @@ def user_to_json(user: User):
 
 
 def post_to_json(post: Post):
-    return jsonable_encoder(post, exclude={"content_search"})
+    return jsonable_encoder(
+        post, exclude={"content_search", "like_count", "images", "likes", "user"}
+    )
+
+
+def post_with_relations_to_json(post: Post):
+    json_post = post_to_json(post)
+    json_post["images"] = [img.image_url for img in post.images]
+    json_post["likes"] = post.like_count
+    return json_post
+
+def post_row_to_json(row):
+    post = jsonable_encoder(row._asdict(), exclude={"content_search"})
+    if "images" in post:
+        post["images"] = post["images"] or []
+    return post
+
+
+def follow_to_json(follow: Follow):
+    return jsonable_encoder(follow)
+
 
 def like_to_json(like: Like):
     return jsonable_encoder(like)
 
 
+def is_file_name(name) -> bool:
+    '''A bare file name, which cannot point outside the upload directory'''
+    return isinstance(name, str) and name not in ("", ".", "..") and Path(name).name == name
+
+
+@traced("write_file")
 async def write_file(image_file: list[UploadFile]):
     image_urls = []
 
+    # checked up front so a bad name does not leave the others half written
+    if not all(is_file_name(image.filename) for image in image_file):
+        raise InvalidFileNameError()
+
     for image in image_file:
-        async with aiofiles.open(
-            f"app\\uploads\\images\\{image.filename}", "wb+"
-        ) as img:
+        async with aiofiles.open(generate_file_path(image.filename), "wb+") as img:
             image_file = await image.read()
             await img.write(image_file)
             image_urls.append(image.filename)
@@ -56,12 +137,17 @@ async def write_file(image_file: list[UploadFile]):
 
 
 def generate_file_path(filename: str):
-    filepath = f"app\\uploads\\images\\{filename}"
-    return filepath
+    if not is_file_name(filename):
+        raise InvalidFileNameError()
+    filepath = Path(settings.IMAGE_UPLOAD_DIR) / filename
+    return str(filepath)
 
 
+@traced("delete_file")
 def delete_file(filename: str):
-    file = Path(f"app\\uploads\\images\\{filename}")
-    print(file)
+    # names stored before they were validated are skipped, not unlinked
+    if not is_file_name(filename):
+        return
+    file = Path(settings.IMAGE_UPLOAD_DIR) / filename
     if file.exists():
         file.unlink()
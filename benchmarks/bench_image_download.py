@@ -0,0 +1,67 @@
+"""Concurrent download throughput for the image serving route.
+
+Start the API, upload an image and attach it to a post, then point the
+benchmark at it:
+
+    python -m benchmarks.bench_image_download --post-id <uuid> --image cat.png \\
+        --concurrency 32 --requests 2000
+
+Pass --range to fetch only a slice of the file (e.g. --range 0-65535) and
+measure the partial download path.
+"""
+import time
+import asyncio
+import argparse
+
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, url: str, headers: dict, jobs: asyncio.Queue, totals: dict):
+    while True:
+        try:
+            jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        response = await client.get(url, headers=headers)
+        if response.status_code not in (200, 206):
+            totals["errors"] += 1
+            continue
+        totals["bytes"] += len(response.content)
+        totals["ok"] += 1
+
+
+async def main(args):
+    url = f"{args.base_url}/posts/{args.post_id}/images/{args.image}/load/"
+    headers = {"Range": f"bytes={args.range}"} if args.range else {}
+
+    jobs = asyncio.Queue()
+    for i in range(args.requests):
+        jobs.put_nowait(i)
+    totals = {"ok": 0, "errors": 0, "bytes": 0}
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(worker(client, url, headers, jobs, totals) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"{totals['ok'] / elapsed:>10.1f} req/s"
+        f"  {totals['bytes'] / elapsed / 1024 / 1024:>8.1f} MiB/s"
+        f"  {totals['errors']} errors"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--post-id", required=True)
+    parser.add_argument("--image", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--range", default=None, help="byte range such as 0-65535")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,109 @@
+"""Like insert throughput and counting queries on a plain vs a hash partitioned likes table.
+
+Creates two scratch tables shaped like likes (one plain, one hash
+partitioned by post_id like the real table), seeds each with the same
+rows and times:
+
+- batched inserts of new likes,
+- count(*) of one post's likes, the per-post lookup like counting uses,
+- count(*) of one user's likes through (user_id, liked_at, post_id).
+
+The tables are dropped afterwards.
+
+    python -m benchmarks.bench_likes_partitioning --rows 1000000 --partitions 16
+"""
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.database.ids import uuid7
+from app.database.session import db_engine
+
+BATCH_SIZE = 5000
+POSTS = 20_000
+USERS = 5_000
+LOOKUPS = 2_000
+
+
+def create(table: str, partitions: int):
+    partition_by = " PARTITION BY HASH (post_id)" if partitions else ""
+    with db_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(
+            text(
+                f"CREATE TABLE {table} (post_id uuid NOT NULL, user_id uuid NOT NULL, "
+                f"liked_at timestamp NOT NULL, PRIMARY KEY (post_id, user_id)){partition_by}"
+            )
+        )
+        for remainder in range(partitions):
+            conn.execute(
+                text(
+                    f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+                    f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+                )
+            )
+        conn.execute(text(f"CREATE INDEX ON {table} (user_id, liked_at, post_id)"))
+
+
+def run(name: str, partitions: int, rows: int, post_ids: list, user_ids: list):
+    table = f"bench_likes_{name}"
+    create(table, partitions)
+
+    insert = text(f"INSERT INTO {table} VALUES (:post_id, :user_id, :liked_at) ON CONFLICT DO NOTHING")
+    rng = random.Random(42)
+    start = time.perf_counter()
+    with db_engine.connect() as conn:
+        for offset in range(0, rows, BATCH_SIZE):
+            count = min(BATCH_SIZE, rows - offset)
+            conn.execute(
+                insert,
+                [
+                    {
+                        "post_id": rng.choice(post_ids),
+                        "user_id": rng.choice(user_ids),
+                        "liked_at": datetime.now(),
+                    }
+                    for _ in range(count)
+                ],
+            )
+            conn.commit()
+    insert_rate = rows / (time.perf_counter() - start)
+
+    with db_engine.begin() as conn:
+        conn.execute(text(f"ANALYZE {table}"))
+
+    def timed_lookups(sql: str, ids: list) -> float:
+        stmt = text(sql)
+        with db_engine.connect() as conn:
+            start = time.perf_counter()
+            for i in range(LOOKUPS):
+                conn.execute(stmt, {"id": ids[i % len(ids)]}).scalar()
+            return (time.perf_counter() - start) / LOOKUPS * 1000
+
+    per_post = timed_lookups(f"SELECT count(*) FROM {table} WHERE post_id = :id", post_ids)
+    per_user = timed_lookups(f"SELECT count(*) FROM {table} WHERE user_id = :id", user_ids)
+
+    with db_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {table}"))
+
+    print(
+        f"{name:<12} {insert_rate:>10.0f} inserts/s"
+        f"  post count {per_post:>6.3f} ms  user count {per_user:>6.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--partitions", type=int, default=16)
+    args = parser.parse_args()
+
+    post_ids = [uuid7() for _ in range(POSTS)]
+    user_ids = [uuid.uuid4() for _ in range(USERS)]
+
+    run("plain", 0, args.rows, post_ids, user_ids)
+    run("partitioned", args.partitions, args.rows, post_ids, user_ids)
@@ -0,0 +1,122 @@
+"""CPU per request of rebuilt vs prebuilt statements for the hot reads.
+
+Runs the feed page, a search, a like lookup and a user lookup --calls
+times each, once building the statement per call the way the services
+used to and once through the prebuilt statements they use now, and
+reports process CPU time and wall time per call. CPU time covers
+SQLAlchemy and psycopg work in this process only, so it is what a worker
+saves per request. --prepare-threshold is passed to psycopg (none turns
+server-side prepared statements off) to compare the database side too.
+
+    python -m benchmarks.bench_statement_cache --calls 2000
+    python -m benchmarks.bench_statement_cache --calls 2000 --prepare-threshold none
+"""
+import time
+import argparse
+from sqlalchemy import create_engine, select, func, and_
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.database.ids import uuid7
+from app.database.session import SessionLocal
+from app.models.users import User
+from app.models.posts import Post, Like
+from app.services.posts import feed_statement, search_statement, LIKE_BY_KEY
+from app.services.users import USER_BY_ID
+
+SEARCH = "benchmark content"
+
+
+def rebuilt(db, ids: dict) -> dict:
+    def feed():
+        return (
+            db.query(Post)
+            .options(selectinload(Post.images))
+            .order_by(Post.id.desc())
+            .offset(0)
+            .limit(10)
+            .all()
+        )
+
+    def search():
+        query_search = func.websearch_to_tsquery("english", SEARCH)
+        return (
+            db.query(Post)
+            .options(selectinload(Post.images))
+            .filter(Post.content_search.op("@@")(query_search))
+            .order_by(func.ts_rank(Post.content_search, query_search).desc(), Post.id)
+            .offset(0)
+            .limit(10)
+            .all()
+        )
+
+    def like():
+        return (
+            db.query(Like)
+            .filter(and_(Like.post_id == ids["post_id"], Like.user_id == ids["user_id"]))
+            .first()
+        )
+
+    def user():
+        return db.query(User).filter(User.id == ids["user_id"]).first()
+
+    return {"feed": feed, "search": search, "get_like": like, "get_user_by_id": user}
+
+
+def prebuilt(db, ids: dict) -> dict:
+    page = {"offset": 0, "limit": 10}
+
+    def feed():
+        return db.scalars(feed_statement(None, None, False), page).all()
+
+    def search():
+        return db.scalars(search_statement(None, None), {"q": SEARCH, **page}).all()
+
+    def like():
+        return db.scalars(LIKE_BY_KEY, ids).first()
+
+    def user():
+        return db.scalars(USER_BY_ID, {"user_id": ids["user_id"]}).first()
+
+    return {"feed": feed, "search": search, "get_like": like, "get_user_by_id": user}
+
+
+def measure(name: str, calls: dict, count: int):
+    for label, call in calls.items():
+        # warm the compiled cache and the prepared statement first
+        for _ in range(10):
+            call()
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(count):
+            call()
+        cpu = (time.process_time() - cpu) / count * 1_000_000
+        wall = (time.perf_counter() - wall) / count * 1000
+        print(f"{name:<10} {label:<16} {cpu:>8.1f} us cpu  {wall:>7.3f} ms wall")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--prepare-threshold", default=str(settings.DATABASE_PREPARE_THRESHOLD))
+    args = parser.parse_args()
+
+    threshold = None if args.prepare_threshold.lower() == "none" else int(args.prepare_threshold)
+    engine = create_engine(settings.DATABASE_URL, connect_args={"prepare_threshold": threshold})
+    db = SessionLocal(bind=engine)
+
+    try:
+        like = db.execute(select(Like.post_id, Like.user_id).limit(1)).first()
+        ids = {"post_id": like.post_id, "user_id": like.user_id} if like else {
+            "post_id": uuid7(),
+            "user_id": uuid7(),
+        }
+        print(f"prepare_threshold={threshold}")
+        measure("rebuilt", rebuilt(db, ids), args.calls)
+        measure("prebuilt", prebuilt(db, ids), args.calls)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
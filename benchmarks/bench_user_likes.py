@@ -0,0 +1,94 @@
+"""Page latency and memory of a heavy user's liked posts.
+
+Seeds one user who has liked --likes posts (100k by default), then times
+the first page and a walk through every page with next_cursor, reporting
+per-page latency and the peak Python memory of a single page. The seeded
+rows are deleted afterwards.
+
+    python -m benchmarks.bench_user_likes --likes 100000 --page-size 50
+"""
+import time
+import asyncio
+import argparse
+import tracemalloc
+from uuid import uuid4
+
+from sqlalchemy import text
+
+from app.models.users import User
+from app.database.session import SessionLocal, db_engine
+from app.services.posts import post_service
+
+SEED_POSTS = text(
+    """
+    INSERT INTO posts (id, user_id, title, content, created_at)
+    SELECT uuid_generate_v7(), :user_id, 'bench post ' || n, 'benchmark content', localtimestamp
+    FROM generate_series(1, :likes) AS n
+    """
+)
+
+SEED_LIKES = text(
+    """
+    INSERT INTO likes (post_id, user_id, liked_at)
+    SELECT id, :user_id, localtimestamp - make_interval(secs => row_number() OVER ())
+    FROM posts WHERE user_id = :user_id
+    """
+)
+
+
+def seed(likes: int):
+    run_id = uuid4().hex[:8]
+    user_id = uuid4()
+    with db_engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO users (id, username, email, password) "
+                "VALUES (:id, :username, :email, 'bench-password')"
+            ),
+            {"id": user_id, "username": f"bench_{run_id}", "email": f"bench_{run_id}@example.com"},
+        )
+        conn.execute(SEED_POSTS, {"user_id": user_id, "likes": likes})
+        conn.execute(SEED_LIKES, {"user_id": user_id})
+        conn.execute(text("ANALYZE likes"))
+    return user_id
+
+
+async def main(likes: int, page_size: int):
+    print(f"seeding {likes} likes...")
+    user_id = seed(likes)
+    db = SessionLocal()
+
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        posts, cursor = await post_service.get_liked_posts(user_id, page_size, db)
+        first_page = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"first page   {first_page * 1000:>8.2f} ms  peak {peak / 1024:>8.1f} KiB")
+
+        pages, rows = 1, len(posts)
+        start = time.perf_counter()
+        while cursor:
+            posts, cursor = await post_service.get_liked_posts(user_id, page_size, db, cursor)
+            pages += 1
+            rows += len(posts)
+        elapsed = time.perf_counter() - start
+        print(
+            f"all pages    {pages} pages / {rows} posts"
+            f"  {elapsed / max(pages - 1, 1) * 1000:>8.2f} ms/page"
+        )
+    finally:
+        db.close()
+        with db_engine.begin() as conn:
+            conn.execute(text("DELETE FROM likes WHERE user_id = :id"), {"id": user_id})
+            conn.execute(text("DELETE FROM posts WHERE user_id = :id"), {"id": user_id})
+            conn.execute(User.__table__.delete().where(User.id == user_id))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--likes", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.likes, args.page_size))
@@ -0,0 +1,55 @@
+"""Insert throughput and primary key index size for random UUIDv4 vs UUIDv7 keys.
+
+Creates two scratch tables, fills each with the same number of rows and
+reports rows/s plus the size of the primary key index. The tables are
+dropped afterwards.
+
+    python -m benchmarks.bench_uuid_keys --rows 1000000
+"""
+import time
+import uuid
+import argparse
+
+from sqlalchemy import text
+
+from app.database.ids import uuid7
+from app.database.session import db_engine
+
+BATCH_SIZE = 5000
+
+
+def run(name: str, make_id, rows: int):
+    table = f"bench_keys_{name}"
+
+    with db_engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TABLE {table} (id uuid PRIMARY KEY, payload text)"))
+
+    insert = text(f"INSERT INTO {table} (id, payload) VALUES (:id, :payload)")
+    start = time.perf_counter()
+    with db_engine.connect() as conn:
+        for offset in range(0, rows, BATCH_SIZE):
+            count = min(BATCH_SIZE, rows - offset)
+            conn.execute(insert, [{"id": make_id(), "payload": "x" * 64} for _ in range(count)])
+            conn.commit()
+    elapsed = time.perf_counter() - start
+
+    with db_engine.begin() as conn:
+        index_size = conn.execute(
+            text("SELECT pg_relation_size(:index)"), {"index": f"{table}_pkey"}
+        ).scalar()
+        conn.execute(text(f"DROP TABLE {table}"))
+
+    print(
+        f"{name:<8} {rows / elapsed:>12.0f} rows/s"
+        f"  pkey index {index_size / 1024 / 1024:>8.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    run("uuid4", uuid.uuid4, args.rows)
+    run("uuid7", uuid7, args.rows)
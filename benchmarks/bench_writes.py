@@ -0,0 +1,107 @@
+"""Write throughput per connection for the user, post and like write paths.
+
+Run from the project root against a migrated database:
+
+    python -m benchmarks.bench_writes --iterations 500
+"""
+import time
+import asyncio
+import argparse
+from uuid import uuid4
+
+from sqlalchemy import event
+
+from app.models.users import User
+from app.database.session import SessionLocal, db_engine
+from app.services.posts import post_service
+from app.services.users import user_service
+from app.schemas.users import UserCreateV1
+from app.schemas.posts import PostCreateV1, PostUpdateV1, LikeCreate
+
+statements = 0
+
+
+@event.listens_for(db_engine, "before_cursor_execute")
+def count_statements(conn, cursor, statement, parameters, context, executemany):
+    global statements
+    statements += 1
+
+
+async def timed(label: str, iterations: int, func):
+    global statements
+    statements = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        await func(i)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<12} {iterations / elapsed:>10.1f} ops/s"
+        f"  {statements / iterations:>5.2f} statements/op"
+    )
+
+
+async def main(iterations: int):
+    run_id = uuid4().hex[:8]
+    db = SessionLocal()
+    post_ids = []
+
+    try:
+        user = await user_service.create_user(
+            UserCreateV1(
+                username=f"bench_{run_id}",
+                email=f"bench_{run_id}@example.com",
+                password="bench-password",
+            ),
+            db,
+        )
+        user_id, username = user.id, user.username
+
+        async def create_user(i):
+            await user_service.create_user(
+                UserCreateV1(
+                    username=f"bench_{run_id}_{i}",
+                    email=f"bench_{run_id}_{i}@example.com",
+                    password="bench-password",
+                ),
+                db,
+            )
+
+        async def create_post(i):
+            post = await post_service.create_post(
+                PostCreateV1(
+                    username=username,
+                    title=f"bench post {i}",
+                    content="benchmark content",
+                    image=[f"bench_{run_id}_{i}.png"],
+                ),
+                db,
+            )
+            post_ids.append(post["id"])
+
+        async def like_post(i):
+            await post_service.like_post(
+                post_ids[i], LikeCreate(user_id=user_id, post_title="bench"), db
+            )
+
+        async def update_post(i):
+            await post_service.update_post(
+                post_ids[i], PostUpdateV1(content=f"updated {i}"), db
+            )
+
+        await timed("create_user", iterations, create_user)
+        await timed("create_post", iterations, create_post)
+        await timed("like_post", iterations, like_post)
+        await timed("update_post", iterations, update_post)
+    finally:
+        db.query(User).filter(User.username.like(f"bench_{run_id}%")).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
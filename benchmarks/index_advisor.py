@@ -0,0 +1,82 @@
+"""Report tables that are read with sequential scans and indexes that are never used.
+
+Reset the statistics, run the benchmark suite, then run the advisor:
+
+    python -m benchmarks.index_advisor --reset
+    python -m benchmarks.bench_writes
+    python -m benchmarks.index_advisor
+"""
+import argparse
+
+from sqlalchemy import text
+
+from app.database.session import db_engine
+
+TABLE_STATS = text(
+    """
+    SELECT relname, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan, n_live_tup
+    FROM pg_stat_user_tables
+    WHERE schemaname = current_schema()
+    ORDER BY seq_tup_read DESC
+    """
+)
+
+UNUSED_INDEXES = text(
+    """
+    SELECT s.relname, s.indexrelname, pg_relation_size(s.indexrelid) AS size
+    FROM pg_stat_user_indexes s
+    JOIN pg_index i ON i.indexrelid = s.indexrelid
+    WHERE s.schemaname = current_schema()
+      AND s.idx_scan = 0
+      AND NOT i.indisprimary
+      AND NOT i.indisunique
+    ORDER BY size DESC
+    """
+)
+
+
+def main(min_rows: int):
+    with db_engine.connect() as conn:
+        tables = conn.execute(TABLE_STATS).all()
+        unused = conn.execute(UNUSED_INDEXES).all()
+
+    print(f"{'table':<24}{'seq_scan':>12}{'seq_tup_read':>16}{'idx_scan':>12}{'rows':>12}")
+    flagged = []
+    for row in tables:
+        print(
+            f"{row.relname:<24}{row.seq_scan:>12}{row.seq_tup_read:>16}"
+            f"{row.idx_scan:>12}{row.n_live_tup:>12}"
+        )
+        if row.n_live_tup >= min_rows and row.seq_scan > row.idx_scan:
+            flagged.append(row.relname)
+
+    print()
+    if flagged:
+        print("Sequential scans outnumber index scans on: " + ", ".join(flagged))
+        print("Check the queries on these tables with EXPLAIN for a missing index.")
+    else:
+        print("No table with more sequential than index scans.")
+
+    if unused:
+        print()
+        print("Indexes not used since the last statistics reset:")
+        for row in unused:
+            print(f"  {row.relname}.{row.indexrelname} ({row.size / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--reset", action="store_true", help="reset statistics before a benchmark run"
+    )
+    parser.add_argument(
+        "--min-rows", type=int, default=1000, help="ignore tables smaller than this"
+    )
+    args = parser.parse_args()
+
+    if args.reset:
+        with db_engine.begin() as conn:
+            conn.execute(text("SELECT pg_stat_reset()"))
+        print("Statistics reset.")
+    else:
+        main(args.min_rows)
@@ -0,0 +1,34 @@
+"""Dump posts, users or likes as NDJSON.
+
+    python -m scripts.export_ndjson posts --output posts.ndjson.gz --gzip
+    python -m scripts.export_ndjson likes --updated-since 2026-01-01T00:00:00
+"""
+import sys
+import argparse
+from datetime import datetime
+
+from app.services.exports import EXPORTS, export_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("entity", choices=sorted(EXPORTS))
+    parser.add_argument("--updated-since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--output", default="-", help="file path, - for stdout")
+    args = parser.parse_args()
+
+    chunks = export_service.export_ndjson(args.entity, args.updated_since, args.gzip)
+
+    if args.output == "-":
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Bulk import posts or likes from an NDJSON file (plain or .gz).
+
+Posts: {"username": ..., "title": ..., "content": ..., "image": [...], "created_at": ...}
+Likes: {"post_id": ..., "user_id": ..., "liked_at": ...}
+
+    python -m scripts.import_ndjson posts legacy_posts.ndjson.gz
+"""
+import gzip
+import json
+import asyncio
+import argparse
+
+from app.database.session import SessionLocal
+from app.services.imports import import_service
+
+READ_SIZE = 1024 * 1024
+
+
+async def read_file(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        while data := f.read(READ_SIZE):
+            yield data
+
+
+async def main(entity: str, path: str):
+    db = SessionLocal()
+    try:
+        if entity == "posts":
+            report = await import_service.import_posts(read_file(path), db)
+        else:
+            report = await import_service.import_likes(read_file(path), db)
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("entity", choices=["posts", "likes"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+    asyncio.run(main(args.entity, args.path))
@@ -0,0 +1,95 @@
+"""Import time and first-request latency of a fresh API worker.
+
+Times `import app.main` in fresh interpreters, then starts uvicorn and
+reports how long the worker took to accept connections and the latency of
+its first requests to the feed and a post, next to the same requests once
+warm. Run it with and without the startup warm-up to compare:
+
+    python -m scripts.measure_cold_start --runs 5
+    python -m scripts.measure_cold_start --runs 5 --no-warmup
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+import httpx
+
+from app.core.config import settings
+
+IMPORT_APP = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def import_time(env: dict) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def timed_get(client: httpx.Client, url: str) -> float:
+    start = time.perf_counter()
+    client.get(url).raise_for_status()
+    return time.perf_counter() - start
+
+
+def first_requests(env: dict, port: int) -> dict:
+    base_url = f"http://127.0.0.1:{port}{settings.API_VERSION_1_PREFIX}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with httpx.Client(timeout=30) as client:
+            # uvicorn only accepts connections once the lifespan startup is done;
+            # the probe does no database work, so the first feed below is cold
+            while True:
+                try:
+                    client.get(f"http://127.0.0.1:{port}/openapi.json")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            # a fresh query string each time, so the feed page cache never answers
+            feed = timed_get(client, f"{base_url}/posts/feed/?limit=10&run=1")
+            post_id = client.get(f"{base_url}/posts/feed/?limit=1&run=2").json()["data"][0]["id"]
+            post = timed_get(client, f"{base_url}/posts/{post_id}/")
+            warm_feed = timed_get(client, f"{base_url}/posts/feed/?limit=10&run=3")
+            warm_post = timed_get(client, f"{base_url}/posts/{post_id}/")
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        "ready": ready,
+        "first feed": feed,
+        "first post": post,
+        "warm feed": warm_feed,
+        "warm post": warm_post,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args()
+
+    env = dict(os.environ, WARMUP_ENABLED="false" if args.no_warmup else "true")
+
+    imports = [import_time(env) for _ in range(args.runs)]
+    print(f"import app.main  median {statistics.median(imports) * 1000:>8.1f} ms")
+
+    results = [first_requests(env, args.port) for _ in range(args.runs)]
+    for name in results[0]:
+        median = statistics.median(result[name] for result in results)
+        print(f"{name:<16} median {median * 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()